@@ -0,0 +1,67 @@
+# backends.py
+# Pluggable inference runtimes. Every backend is a callable taking a float
+# NCHW batch tensor and returning logits, so callers don't care which runtime
+# is behind the model:
+#   eager        plain PyTorch nn.Module
+#   torchscript  traced, frozen and optimized for inference (conv/bn folding, fusion)
+#   onnx         ONNX Runtime on CPU
+import os
+
+import torch
+
+BACKENDS = ("eager", "torchscript", "onnx")
+
+
+def to_torchscript(model, device="cpu", size=224):
+    # Freezing inlines weights as constants, so trace on the serving device.
+    model = model.to(device).eval()
+    example = torch.randn(1, 3, size, size, device=device)
+    with torch.no_grad():
+        traced = torch.jit.trace(model, example)
+    return torch.jit.optimize_for_inference(torch.jit.freeze(traced))
+
+
+def export_onnx(model, path, size=224, opset=17):
+    model = model.cpu().eval()
+    torch.onnx.export(
+        model,
+        torch.randn(1, 3, size, size),
+        path,
+        input_names=["input"],
+        output_names=["logits"],
+        # Height and width stay dynamic for the resolution modes (preprocessing.RESOLUTIONS)
+        dynamic_axes={"input": {0: "batch", 2: "height", 3: "width"}, "logits": {0: "batch"}},
+        opset_version=opset,
+    )
+
+
+class OnnxRuntimeModel:
+    # Quacks like an eval-mode nn.Module for the parts callers use.
+    def __init__(self, path, threads=None):
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise ImportError("the onnx backend needs onnxruntime: pip install onnxruntime") from e
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, batch):
+        (logits,) = self.session.run(None, {self.input_name: batch.detach().cpu().numpy()})
+        return torch.from_numpy(logits)
+
+    def to(self, *args, **kwargs):
+        return self
+
+    def eval(self):
+        return self
+
+
+def onnx_path_for(path):
+    onnx_path = os.path.splitext(path)[0] + ".onnx"
+    if not os.path.exists(onnx_path):
+        raise FileNotFoundError(f"{onnx_path} not found; run python export_model.py --formats onnx first")
+    return onnx_path
@@ -0,0 +1,45 @@
+# batch_inference.py
+# The batch function behind every micro-batcher (serve.py, inference_jobs.py):
+# a list of preprocessed tensors in, one top-k list per tensor out. Tensors
+# of different shapes (resolution modes) run as separate forward passes.
+#
+#   batcher = MicroBatcher(make_predict_batch(loaded, k=3))
+import torch
+
+import metrics
+from cascade import get_cascade
+from postprocessing import top_k_lists
+
+
+def shape_buckets(tensors):
+    # {shape: [indices]} in first-seen order.
+    buckets = {}
+    for i, tensor in enumerate(tensors):
+        buckets.setdefault(tuple(tensor.shape), []).append(i)
+    return buckets
+
+
+def make_predict_batch(loaded, k=3):
+    # The cascade returns calibrated log-probabilities, hence temperature 1
+    cascade = get_cascade(loaded)
+    model, temperature = (cascade, 1.0) if cascade else (loaded.model, loaded.temperature)
+
+    def predict_bucket(tensors):
+        with metrics.stage("device_transfer"):
+            batch = loaded.to_device(torch.stack(tensors))
+        with metrics.stage("inference"):
+            output = model(batch)
+        with metrics.stage("postprocess"):
+            return top_k_lists(output, k, temperature)
+
+    def predict_batch(tensors):
+        # Inputs of different resolutions cannot share a tensor: one forward
+        # pass per shape, results put back in submission order.
+        results = [None] * len(tensors)
+        with metrics.maybe_profile("batch"), torch.inference_mode():
+            for indices in shape_buckets(tensors).values():
+                for i, top in zip(indices, predict_bucket([tensors[i] for i in indices])):
+                    results[i] = top
+        return results
+
+    return predict_batch
@@ -0,0 +1,127 @@
+# batch_predict.py
+# Headless batch inference over image directories or file lists.
+#
+#   python batch_predict.py field_photos/ -o predictions.csv
+#   python batch_predict.py paths.txt -o predictions.jsonl --batch-size 128 --workers 8
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+import torch
+
+import config
+from image_data import image_loader, list_images
+from embeddings import extract
+from model_registry import MODEL_PATH, get_model
+from postprocessing import describe, top_k_lists
+
+
+# ---------------------------
+# Output writers
+# ---------------------------
+FIELDS = ["path", "class_index", "class_name", "confidence", "top_k", "error"]
+
+
+class PredictionWriter:
+    def __init__(self, path, fmt=None):
+        self.fmt = fmt or ("jsonl" if path.endswith((".jsonl", ".json")) else "csv")
+        self.file = sys.stdout if path == "-" else open(path, "w", newline="")
+        if self.fmt == "csv":
+            self.csv = csv.DictWriter(self.file, fieldnames=FIELDS)
+            self.csv.writeheader()
+
+    def write(self, row):
+        if self.fmt == "csv":
+            # top_k flattened to "name:probability|name:probability"
+            top = "|".join(f"{t['class_name']}:{t['probability']:.4f}" for t in row.get("top_k", []))
+            self.csv.writerow({**row, "top_k": top})
+        else:
+            self.file.write(json.dumps(row) + "\n")
+
+    def close(self):
+        if self.file is not sys.stdout:
+            self.file.close()
+
+
+# ---------------------------
+# Batch inference
+# ---------------------------
+def run(paths, writer, model_path=MODEL_PATH, batch_size=64, workers=4, k=config.TOP_K, embeddings=False):
+    loaded = get_model(model_path)
+    model, idx_to_class = loaded.model, loaded.idx_to_class
+
+    loader = image_loader(paths, batch_size, workers, pin_memory=loaded.device.type == "cuda")
+
+    done = errors = 0
+    start = time.perf_counter()
+    with torch.inference_mode():
+        for batch_paths, batch, failed in loader:
+            for path, error in failed:
+                writer.write({"path": path, "class_index": "", "class_name": "", "confidence": "", "error": error})
+            errors += len(failed)
+            if batch is None:
+                continue
+
+            batch = loaded.to_device(batch)
+            if embeddings:
+                output, features = extract(model, batch)
+                features = features.half().tolist()
+            else:
+                output, features = model(batch), [None] * len(batch_paths)
+            for path, top, feature in zip(batch_paths, top_k_lists(output, k, loaded.temperature), features):
+                top = describe(top, idx_to_class)
+                best = top[0]
+                writer.write(
+                    {
+                        "path": path,
+                        "class_index": best["class_index"],
+                        "class_name": best["class_name"],
+                        "confidence": best["probability"],
+                        "top_k": top,
+                        "error": "",
+                        **({"embedding": feature} if embeddings else {}),
+                    }
+                )
+            done += len(batch_paths)
+    elapsed = time.perf_counter() - start
+    return done, errors, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Classify a directory or list of crop images.")
+    parser.add_argument("source", help="image directory, or a text file with one image path per line")
+    parser.add_argument("-o", "--output", default="-", help="CSV or JSONL output path (default: stdout as CSV)")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="override format inferred from --output")
+    parser.add_argument("--model", default=MODEL_PATH, help="checkpoint path")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--top-k", type=int, default=config.TOP_K, help="alternatives per image")
+    parser.add_argument("--embeddings", action="store_true", help="include penultimate-layer embeddings (JSONL only)")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1), help="decode/resize workers")
+    args = parser.parse_args(argv)
+
+    paths = list_images(args.source)
+    if not paths:
+        parser.error(f"no images found in {args.source}")
+
+    writer = PredictionWriter(args.output, args.format)
+    if args.embeddings and writer.fmt != "jsonl":
+        parser.error("--embeddings needs JSONL output")
+    try:
+        done, errors, elapsed = run(
+            paths, writer, args.model, args.batch_size, args.workers, args.top_k, args.embeddings
+        )
+    finally:
+        writer.close()
+
+    print(
+        f"Classified {done} images in {elapsed:.1f}s "
+        f"({done / elapsed if elapsed else 0:.1f} images/sec), {errors} failed",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,2 @@
+# Benchmark scripts. Run from the repository root, e.g.
+#   python -m benchmarks.load_test path/to/leaf.jpg
@@ -0,0 +1,42 @@
+# benchmarks/backends.py
+# Per-backend forward latency at several batch sizes.
+#
+#   python export_model.py
+#   python -m benchmarks.backends --batch-sizes 1 8 32
+import argparse
+
+import torch
+
+import backends
+from evaluation import time_forward
+from model_registry import MODEL_PATH, get_model
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare eager, TorchScript and ONNX Runtime latency.")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--backends", nargs="+", choices=backends.BACKENDS, default=list(backends.BACKENDS))
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 8, 32])
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--threads", type=int, help="torch.set_num_threads for the run")
+    args = parser.parse_args(argv)
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    print(f"{'backend':<12}" + "".join(f"{f'bs={b} ms':>12}{'img/s':>9}" for b in args.batch_sizes))
+    for name in args.backends:
+        try:
+            model = get_model(args.model, backend=name).model
+        except (FileNotFoundError, ImportError) as e:
+            print(f"{name:<12} skipped: {e}")
+            continue
+        row = f"{name:<12}"
+        for batch_size in args.batch_sizes:
+            ms = time_forward(model, batch_size, repeats=args.repeats)
+            row += f"{ms:>12.2f}{batch_size * 1000 / ms:>9.1f}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
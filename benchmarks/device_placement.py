@@ -0,0 +1,71 @@
+# benchmarks/device_placement.py
+# Per-request cost of the old upload path (pick device, model.to(device),
+# pageable copy, no_grad, NCHW) vs the current one (placement chosen once at
+# load, pinned non-blocking copy, inference_mode, channels-last), at the
+# configured thread count.
+#
+#   python -m benchmarks.device_placement --requests 200
+import argparse
+import statistics
+import time
+
+import torch
+
+import runtime
+from model_registry import build_model
+
+
+def old_request(model, image):
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    model.to(device)
+    batch = image.unsqueeze(0).to(device)
+    with torch.no_grad():
+        return model(batch).argmax(1).item()
+
+
+def make_new_request(model):
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    model = model.to(memory_format=torch.channels_last).to(device)
+
+    def new_request(image):
+        batch = image.unsqueeze(0)
+        if device.type == "cuda":
+            batch = batch.pin_memory().to(device, non_blocking=True)
+        batch = batch.contiguous(memory_format=torch.channels_last)
+        with torch.inference_mode():
+            return model(batch).argmax(1).item()
+
+    return new_request
+
+
+def time_requests(fn, images, warmup=5):
+    for image in images[:warmup]:
+        fn(image)
+    timings = []
+    for image in images:
+        start = time.perf_counter()
+        fn(image)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), statistics.quantiles(timings, n=20)[-1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare per-request device handling overhead.")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--threads", type=int, help="defaults to the container CPU quota")
+    args = parser.parse_args(argv)
+
+    threads = runtime.configure_threads(args.threads)
+    torch.manual_seed(0)
+    model = build_model(140).eval()
+    images = [torch.randn(3, 224, 224) for _ in range(args.requests)]
+
+    old_p50, old_p95 = time_requests(lambda image: old_request(model, image), images)
+    new_p50, new_p95 = time_requests(make_new_request(build_model(140).eval()), images)
+    print(f"threads={threads} (cpu quota {runtime.cpu_quota()}), {args.requests} single-image requests")
+    print(f"old path: p50 {old_p50:.2f} ms, p95 {old_p95:.2f} ms")
+    print(f"new path: p50 {new_p50:.2f} ms, p95 {new_p95:.2f} ms ({old_p50 - new_p50:.2f} ms saved per request)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# benchmarks/load_test.py
+# Load generator for serve.py: fires concurrent /predict requests and reports
+# client-side latency percentiles, throughput and the server's achieved batch size.
+# Requests cycle through the given images (files or folders) and each payload
+# gets a unique trailing nonce, so the server's prediction cache never hits and
+# every request reaches the micro-batcher. --repeat-payload measures the cached path.
+#
+#   python serve.py --max-batch-size 16 --max-wait-ms 5 &
+#   python -m benchmarks.load_test leaf.jpg --concurrency 32 --requests 2000
+#   python -m benchmarks.load_test sample_images/ --concurrency 32 --requests 2000
+import argparse
+import json
+import os
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from micro_batcher import percentile
+
+# Same as preprocessing.IMAGE_EXTENSIONS; importing it would pull in torch
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+def read_images(sources):
+    # Files and (non-recursive) folders -> [(bytes, content type)].
+    paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            paths.extend(
+                os.path.join(source, name)
+                for name in sorted(os.listdir(source))
+                if name.lower().endswith(IMAGE_EXTENSIONS)
+            )
+        else:
+            paths.append(source)
+    images = []
+    for path in paths:
+        with open(path, "rb") as f:
+            images.append((f.read(), "image/png" if path.lower().endswith(".png") else "image/jpeg"))
+    return images
+
+
+def payload(images, i, unique):
+    # Decoders ignore bytes after the end-of-image marker, so a nonce appended
+    # there changes the content hash without changing the prediction.
+    data, content_type = images[i % len(images)]
+    return (data + b"nonce:%d" % i if unique else data), content_type
+
+
+def post_image(url, data, content_type):
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": content_type})
+    start = time.perf_counter()
+    with urllib.request.urlopen(request) as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the HTTP inference service.")
+    parser.add_argument("images", nargs="+", help="image files or folders; requests cycle through them")
+    parser.add_argument("--url", default="http://localhost:8080")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument(
+        "--repeat-payload", action="store_true", help="send identical bytes every time (measures cache hits)"
+    )
+    args = parser.parse_args(argv)
+
+    images = read_images(args.images)
+    if not images:
+        parser.error("no images found")
+    unique = not args.repeat_payload
+    url = args.url.rstrip("/") + "/predict"
+
+    post_image(url, *payload(images, -1, unique))  # warm-up
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        latencies = sorted(pool.map(lambda i: post_image(url, *payload(images, i, unique)), range(args.requests)))
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}: {args.requests / elapsed:.1f} req/sec")
+    print("client latency ms: " + ", ".join(f"p{q}={percentile(latencies, q) * 1000:.1f}" for q in (50, 95, 99)))
+    with urllib.request.urlopen(args.url.rstrip("/") + "/metrics") as response:
+        print("server metrics: " + json.dumps(json.load(response)))
+
+
+if __name__ == "__main__":
+    main()
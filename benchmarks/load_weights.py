@@ -0,0 +1,77 @@
+# benchmarks/load_weights.py
+# Cold-start comparison of checkpoint formats: load time and memory of a fresh
+# process loading crop_classifier_model.pkl vs the mmap-able .safetensors file,
+# with CROP_CHANNELS_LAST on and off. Checkpoints are NCHW, so channels-last
+# copies the conv weights out of the mapping: private MB goes up.
+#
+#   python weights_io.py crop_classifier_model.pkl
+#   python -m benchmarks.load_weights crop_classifier_model.pkl crop_classifier_model.safetensors
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+def memory_breakdown():
+    # Rss counts shared file pages in every process; Private is what each
+    # extra worker really costs.
+    fields = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == "kB":
+                    fields[parts[0].rstrip(":")] = int(parts[1]) * 1024
+    except OSError:
+        return {}
+    private = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    return {"rss_mb": fields.get("Rss", 0) / 2**20, "private_mb": private / 2**20}
+
+
+def child(path):
+    import model_registry
+
+    entry = model_registry.get_model(path)
+    print(json.dumps({"load_seconds": entry.load_seconds, **memory_breakdown()}))
+
+
+def measure(path, repeats, channels_last):
+    runs = []
+    env = {**os.environ, "CROP_CHANNELS_LAST": "1" if channels_last else "0"}
+    for _ in range(repeats):
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.load_weights", "--child", path],
+            check=True,
+            capture_output=True,
+            text=True,
+            env=env,
+        ).stdout
+        runs.append(json.loads(out.strip().splitlines()[-1]))
+    return {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare checkpoint load time and memory.")
+    parser.add_argument("checkpoints", nargs="+", help=".pkl and/or .safetensors paths")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child(args.checkpoints[0])
+        return
+
+    print(f"{'checkpoint':<45} {'channels-last':>13} {'load s':>8} {'rss MB':>8} {'private MB':>11}")
+    for path in args.checkpoints:
+        for channels_last in (True, False):
+            result = measure(path, args.repeats, channels_last)
+            print(
+                f"{path:<45} {'on' if channels_last else 'off':>13} {result['load_seconds']:>8.3f} "
+                f"{result.get('rss_mb', 0):>8.1f} {result.get('private_mb', 0):>11.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# benchmarks/preprocessing.py
+# Original transform vs the draft-mode fast path on a folder of large photos:
+# time per image, peak memory, and how close the resulting tensors are.
+#
+#   python -m benchmarks.preprocessing big_photos/ --limit 100
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+from image_data import list_images
+from model_registry import current_rss_bytes
+from preprocessing import fast_preprocess, load_image, transform
+
+PIPELINES = {
+    "transform": lambda path: transform(load_image(path)),
+    "fast": fast_preprocess,
+}
+
+
+def child(name, paths):
+    # Runs in its own process so ru_maxrss reflects this pipeline only.
+    preprocess = PIPELINES[name]
+    preprocess(paths[0])  # warm-up (imports, allocator)
+    baseline = current_rss_bytes()
+    start = time.perf_counter()
+    for path in paths:
+        preprocess(path)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    print(json.dumps({"ms_per_image": elapsed * 1000 / len(paths), "peak_mb": max(0, peak - baseline) / 2**20}))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark image decode/resize pipelines.")
+    parser.add_argument("folder", help="folder of (large) JPEG/PNG images")
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--child", choices=PIPELINES, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    paths = list_images(args.folder)[: args.limit]
+    if not paths:
+        parser.error(f"no images found in {args.folder}")
+    if args.child:
+        child(args.child, paths)
+        return
+
+    print(f"{len(paths)} images")
+    print(f"{'pipeline':<10} {'ms/image':>9} {'peak MB over baseline':>22}")
+    for name in PIPELINES:
+        out = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.preprocessing",
+                args.folder,
+                "--limit",
+                str(args.limit),
+                "--child",
+                name,
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        print(f"{name:<10} {result['ms_per_image']:>9.1f} {result['peak_mb']:>22.1f}")
+
+    diffs = [(PIPELINES["fast"](p) - PIPELINES["transform"](p)).abs() for p in paths]
+    print(
+        f"fast vs transform: mean |diff| {sum(d.mean().item() for d in diffs) / len(diffs):.4f}, "
+        f"max |diff| {max(d.max().item() for d in diffs):.4f} (normalized units)"
+    )
+
+
+if __name__ == "__main__":
+    main()
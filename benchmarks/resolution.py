@@ -0,0 +1,64 @@
+# benchmarks/resolution.py
+# Accuracy/latency curve of the input resolution modes (preprocessing.RESOLUTIONS)
+# for one checkpoint on a labeled folder (root/<class name>/<image>), so the
+# operating point for CROP_RESOLUTION can be picked per machine. Mode 0 is the
+# original 224x224 resize; the others resize the shorter side and center-crop.
+#
+#   python -m benchmarks.resolution labeled_folder/
+#   python -m benchmarks.resolution labeled_folder/ --resolutions 0 160 224 --max-drop 0.01
+import argparse
+import functools
+import os
+
+from evaluation import accuracy, collect_logits, time_forward
+from image_data import list_labeled_images
+from model_registry import MODEL_PATH, get_model
+from preprocessing import RESOLUTIONS, center_crop_resize, fast_resize
+
+
+def resolution_transform(resolution):
+    # PIL image -> model input for one mode (picklable for loader workers).
+    if not resolution:
+        return fast_resize
+    return functools.partial(center_crop_resize, size=resolution)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark accuracy and latency per input resolution.")
+    parser.add_argument("folder", help="labeled images, one sub-folder per class")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--resolutions", nargs="+", type=int, choices=RESOLUTIONS, default=list(RESOLUTIONS))
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--max-drop", type=float, default=0.005, help="accuracy loss allowed for the suggestion")
+    args = parser.parse_args(argv)
+
+    loaded = get_model(args.model)
+    paths, labels = list_labeled_images(args.folder, loaded.class_to_idx)
+    if not paths:
+        parser.error(f"no images of known classes under {args.folder}")
+
+    rows = []
+    for resolution in args.resolutions:
+        logits, targets = collect_logits(
+            loaded.model, paths, labels, args.batch_size, args.workers, loaded.device, resolution_transform(resolution)
+        )
+        size = resolution or 224
+        single = time_forward(loaded.model, 1, loaded.device, size=size)
+        batched = time_forward(loaded.model, args.batch_size, loaded.device, size=size)
+        rows.append((resolution, accuracy(logits, targets), single, args.batch_size * 1000 / batched))
+
+    print(f"{len(targets)} images, {loaded.architecture} on {loaded.backend} backend, {loaded.device}")
+    print(f"{'resolution':<18} {'top-1':>7} {'bs=1 ms':>8} {f'bs={args.batch_size} img/s':>12}")
+    for resolution, acc, single, throughput in rows:
+        name = f"{resolution} (center crop)" if resolution else "0 (224 stretched)"
+        print(f"{name:<18} {acc:>7.2%} {single:>8.2f} {throughput:>12.1f}")
+
+    best = max(acc for _, acc, _, _ in rows)
+    within = [row for row in rows if row[1] >= best - args.max_drop]
+    resolution, acc, single, _ = min(within, key=lambda row: row[2])
+    print(f"Suggested: CROP_RESOLUTION={resolution} ({acc:.2%} top-1, {single:.2f} ms/image; best {best:.2%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# benchmarks/startup.py
+# Cold-start breakdown. Each group of modules is imported in a fresh
+# interpreter under `python -X importtime`, and the slowest top-level imports
+# are listed. "shell" is what app.py / serve.py import before the first render
+# or health check; "model" is what warmup.py loads in the background.
+# With --serve, serve.py is started and the seconds until /healthz and /readyz
+# first answer 200 are reported.
+#
+#   python -m benchmarks.startup
+#   python -m benchmarks.startup --top 15 --serve
+import argparse
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+GROUPS = {
+    "shell": ["config", "metrics", "warmup", "prediction_cache", "micro_batcher", "streamlit"],
+    "model": ["model_registry", "preprocessing", "postprocessing", "embeddings", "stream_predict"],
+}
+
+
+def import_times(modules):
+    # Returns (wall seconds, [(cumulative us, self us, module)] for top-level imports).
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + ", ".join(modules)],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    wall = time.perf_counter() - start
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        rows.append((int(cumulative_us), int(self_us), len(name) - len(name.lstrip()), name.strip()))
+    top_level = min((depth for _, _, depth, _ in rows), default=0)
+    return wall, [(c, s, name) for c, s, depth, name in rows if depth == top_level]
+
+
+def wait_for(url, timeout):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return True
+        except (urllib.error.URLError, ConnectionError):
+            pass
+        time.sleep(0.02)
+    return False
+
+
+def time_serve(port, timeout):
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "serve.py", "--port", str(port)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        results = {}
+        for endpoint in ("healthz", "readyz"):
+            ok = wait_for(f"http://127.0.0.1:{port}/{endpoint}", timeout)
+            results[endpoint] = time.perf_counter() - start if ok else None
+        return results
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cold-start import and readiness times.")
+    parser.add_argument("--top", type=int, default=10, help="slowest imports listed per group")
+    parser.add_argument("--serve", action="store_true", help="also time serve.py until /healthz and /readyz")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8099)))
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args(argv)
+
+    for group, modules in GROUPS.items():
+        wall, rows = import_times(modules)
+        print(f"{group}: {wall * 1000:.0f} ms wall ({', '.join(modules)})")
+        print(f"  {'cumulative ms':>13} {'self ms':>8}  module")
+        for cumulative, own, name in sorted(rows, reverse=True)[: args.top]:
+            print(f"  {cumulative / 1000:>13.1f} {own / 1000:>8.1f}  {name}")
+
+    if args.serve:
+        results = time_serve(args.port, args.timeout)
+        for endpoint, seconds in results.items():
+            print(f"serve.py /{endpoint}: " + (f"{seconds:.2f}s" if seconds is not None else "timed out"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# benchmarks/suite.py
+# Reproducible inference benchmark: model load time, preprocessing time,
+# forward latency across batch sizes and thread counts, end-to-end images/sec
+# and peak RSS. Falls back to randomly initialized weights and synthetic images
+# when crop_classifier_model.pkl is absent, so it runs anywhere.
+#
+#   python -m benchmarks.suite -o results.json
+#   python -m benchmarks.suite --save-baseline benchmarks/baseline.json
+#   python -m benchmarks.suite --baseline benchmarks/baseline.json --threshold 0.10
+import argparse
+import io
+import json
+import os
+import platform
+import resource
+import statistics
+import sys
+import time
+
+import numpy as np
+import torch
+import torchvision
+from PIL import Image
+
+from evaluation import time_forward
+from model_registry import MODEL_PATH, build_model, get_model
+from preprocessing import fast_preprocess, load_image, transform
+
+NUM_CLASSES = 140
+
+
+def synthetic_images(count, size=(2016, 1512), seed=0):
+    # Smooth random images compress like photos, unlike pure noise.
+    rng = np.random.default_rng(seed)
+    images = []
+    for _ in range(count):
+        small = rng.integers(0, 256, (size[1] // 32, size[0] // 32, 3), dtype=np.uint8)
+        image = Image.fromarray(small).resize(size, Image.BILINEAR)
+        buf = io.BytesIO()
+        image.save(buf, format="JPEG", quality=90)
+        images.append(buf.getvalue())
+    return images
+
+
+def load_model(path):
+    if os.path.exists(path):
+        entry = get_model(path)
+        return entry.model, entry.load_seconds, False
+    torch.manual_seed(0)
+    start = time.perf_counter()
+    model = build_model(NUM_CLASSES).eval()
+    return model, time.perf_counter() - start, True
+
+
+def time_preprocess(preprocess, images, repeats=3):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for data in images:
+            preprocess(io.BytesIO(data))
+        timings.append((time.perf_counter() - start) * 1000 / len(images))
+    return statistics.median(timings)
+
+
+def end_to_end(model, images, batch_size):
+    start = time.perf_counter()
+    with torch.inference_mode():
+        for i in range(0, len(images), batch_size):
+            batch = torch.stack([fast_preprocess(io.BytesIO(data)) for data in images[i : i + batch_size]])
+            model(batch)
+    return len(images) / (time.perf_counter() - start)
+
+
+def run(args):
+    model, load_seconds, synthetic = load_model(args.model)
+    images = synthetic_images(args.images)
+    metrics = {"load_seconds": load_seconds}
+
+    metrics["preprocess_ms.transform"] = time_preprocess(lambda fp: transform(load_image(fp)), images)
+    metrics["preprocess_ms.fast"] = time_preprocess(fast_preprocess, images)
+
+    default_threads = torch.get_num_threads()
+    for threads in args.threads:
+        torch.set_num_threads(threads)
+        for batch_size in args.batch_sizes:
+            ms = time_forward(model, batch_size, repeats=args.repeats)
+            metrics[f"forward_ms.t{threads}.bs{batch_size}"] = ms
+            metrics[f"forward_images_per_sec.t{threads}.bs{batch_size}"] = batch_size * 1000 / ms
+    torch.set_num_threads(default_threads)
+
+    metrics["e2e_images_per_sec"] = end_to_end(model, images, max(args.batch_sizes))
+    metrics["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "torch": torch.__version__,
+            "torchvision": torchvision.__version__,
+            "cpu_count": os.cpu_count(),
+            "machine": platform.machine(),
+            "synthetic_weights": synthetic,
+        },
+        "metrics": {name: round(value, 4) for name, value in metrics.items()},
+    }
+
+
+def compare(results, baseline, threshold):
+    # Returns the list of regressed metric names, printing a side-by-side table.
+    regressions = []
+    print(f"{'metric':<36} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, current in results["metrics"].items():
+        previous = baseline["metrics"].get(name)
+        if not previous:
+            continue
+        change = (current - previous) / previous
+        # Throughput metrics regress when they drop; times and sizes when they grow.
+        worse = -change if "images_per_sec" in name else change
+        flag = "  REGRESSION" if worse > threshold else ""
+        print(f"{name:<36} {previous:>10.3f} {current:>10.3f} {change:>+8.1%}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Crop classifier inference benchmark suite.")
+    parser.add_argument("--model", default=MODEL_PATH, help="checkpoint; random weights if missing")
+    parser.add_argument("--images", type=int, default=32, help="number of synthetic 3 MP JPEGs")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 8, 32])
+    parser.add_argument("--threads", nargs="+", type=int, default=sorted({1, torch.get_num_threads()}))
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("-o", "--output", help="write results JSON here")
+    parser.add_argument("--save-baseline", metavar="PATH", help="write results as the new baseline")
+    parser.add_argument("--baseline", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed relative slowdown (0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    print(json.dumps(results, indent=2))
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        changed = [key for key, value in results["environment"].items() if baseline["environment"].get(key) != value]
+        if changed:
+            print(f"note: environment differs from baseline in {', '.join(changed)}", file=sys.stderr)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            sys.exit(f"{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# benchmarks/tta.py
+# Accuracy and latency of test-time augmentation per number of views on a
+# labeled folder (root/<class name>/<image>). Every image is run once with all
+# views; accuracy for n views averages the first n, so each row is measured on
+# exactly the same forward passes. Latency is one image's batched views.
+#
+#   python -m benchmarks.tta labeled_folder/ --views 1 2 4 8
+import argparse
+import functools
+import os
+
+import torch
+
+import tta
+from evaluation import accuracy, time_forward
+from image_data import image_loader, list_labeled_images
+from model_registry import MODEL_PATH, get_model
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark test-time augmentation view counts.")
+    parser.add_argument("folder", help="labeled images, one sub-folder per class")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--views", nargs="+", type=int, default=[1, 2, 4, 8])
+    parser.add_argument("--batch-size", type=int, default=16, help="images per batch (x views each)")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    args = parser.parse_args(argv)
+    if not all(1 <= v <= tta.MAX_VIEWS for v in args.views):
+        parser.error(f"--views must be between 1 and {tta.MAX_VIEWS}")
+
+    loaded = get_model(args.model)
+    paths, labels = list_labeled_images(args.folder, loaded.class_to_idx)
+    if not paths:
+        parser.error(f"no images of known classes under {args.folder}")
+    label_of = dict(zip(paths, labels))
+    most = max(args.views)
+
+    logits, targets = [], []
+    with torch.inference_mode():
+        for batch_paths, batch, _ in image_loader(
+            paths, args.batch_size, args.workers, transform=functools.partial(tta.tta_views, views=most)
+        ):
+            if batch is None:
+                continue
+            views = loaded.to_device(batch.flatten(0, 1))
+            logits.append(loaded.model(views).float().cpu().view(len(batch_paths), most, -1))
+            targets.extend(label_of[path] for path in batch_paths)
+    logits, targets = torch.cat(logits), torch.tensor(targets)
+
+    print(f"{len(targets)} images, {loaded.backend} backend on {loaded.device}")
+    print(f"{'views':>5} {'top-1':>7} {'ms/image':>9} {'images/s':>9}")
+    for v in sorted(args.views):
+        acc = accuracy(logits[:, :v].mean(1), targets)
+        ms = time_forward(loaded.model, v)
+        print(f"{v:>5} {acc:>7.2%} {ms:>9.2f} {1000 / ms:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# benchmarks/worker_pool.py
+# Throughput and memory of the forked worker pool as the number of workers
+# grows: images/sec should scale with cores while the summed PSS stays close
+# to a single model copy.
+#
+#   python -m benchmarks.worker_pool --workers 1 2 4
+import argparse
+import os
+import time
+
+import torch
+
+from model_registry import MODEL_PATH, build_model, get_model
+from worker_pool import WorkerPool, process_memory
+
+
+def predict(model):
+    def fn(batch):
+        return model(batch).argmax(1).tolist()
+
+    return fn
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the multi-process inference pool.")
+    parser.add_argument("--model", default=MODEL_PATH, help="checkpoint; random weights if missing")
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4])
+    parser.add_argument("--batches", type=int, default=64)
+    parser.add_argument("--batch-size", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    if os.path.exists(args.model):
+        model = get_model(args.model).model
+    else:
+        torch.manual_seed(0)
+        model = build_model(140).eval()
+    batches = [torch.randn(args.batch_size, 3, 224, 224) for _ in range(args.batches)]
+    parent_pss = process_memory()["pss"]
+
+    print(f"{'workers':>7} {'cores/worker':>12} {'images/s':>9} {'pool PSS MB':>12} {'parent PSS MB':>14}")
+    for workers in args.workers:
+        pool = WorkerPool(predict(model), workers)
+        pool.submit(batches[0]).result()  # warm-up: workers import and touch the weights
+        start = time.perf_counter()
+        futures = [pool.submit(batch) for batch in batches]
+        for future in futures:
+            future.result()
+        images_per_sec = len(batches) * args.batch_size / (time.perf_counter() - start)
+        memory = pool.memory()
+        print(
+            f"{len(pool.processes):>7} {len(pool.core_groups[0]):>12} {images_per_sec:>9.1f} "
+            f"{memory['pss'] / 2**20:>12.1f} {parent_pss / 2**20:>14.1f}"
+        )
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# calibration.py
+# Fits a softmax temperature on a labeled validation folder so the reported
+# confidences match observed accuracy. The model registry picks it up from
+# <checkpoint>.calibration.json.
+#
+#   python calibration.py validation/
+import argparse
+import json
+import os
+
+import torch
+
+from evaluation import accuracy, collect_logits, expected_calibration_error
+from image_data import list_labeled_images
+from model_registry import MODEL_PATH, calibration_path, get_model
+
+
+def fit_temperature(logits, targets, steps=50):
+    # Optimize log(T) so T stays positive.
+    log_t = torch.zeros(1, requires_grad=True)
+    optimizer = torch.optim.LBFGS([log_t], lr=0.1, max_iter=steps)
+
+    def closure():
+        optimizer.zero_grad()
+        loss = torch.nn.functional.cross_entropy(logits / log_t.exp(), targets)
+        loss.backward()
+        return loss
+
+    optimizer.step(closure)
+    return log_t.exp().item()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fit temperature scaling on a labeled validation folder.")
+    parser.add_argument("folder", help="labeled folder (root/<class name>/*.jpg)")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    args = parser.parse_args(argv)
+
+    loaded = get_model(args.model)
+    paths, labels = list_labeled_images(args.folder, loaded.class_to_idx)
+    if not paths:
+        parser.error(f"no labeled images found in {args.folder}")
+    logits, targets = collect_logits(loaded.model, paths, labels, args.batch_size, args.workers)
+
+    temperature = fit_temperature(logits, targets)
+    nll = torch.nn.functional.cross_entropy
+    print(f"{len(targets)} images, accuracy {accuracy(logits, targets):.4f}")
+    print(f"T=1.000: NLL {nll(logits, targets).item():.4f}, ECE {expected_calibration_error(logits, targets):.4f}")
+    print(
+        f"T={temperature:.3f}: NLL {nll(logits / temperature, targets).item():.4f}, "
+        f"ECE {expected_calibration_error(logits / temperature, targets):.4f}"
+    )
+
+    out_path = calibration_path(args.model)
+    with open(out_path, "w") as f:
+        json.dump({"temperature": temperature, "images": len(targets)}, f, indent=2)
+    print(f"Wrote {out_path}")
+
+
+if __name__ == "__main__":
+    main()
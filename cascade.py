@@ -0,0 +1,172 @@
+# cascade.py
+# Confidence-gated cascade: a cheap first stage (a small distilled model, or
+# the same ResNet-18 on a downscaled input) answers when the margin between
+# its top two probabilities is at least `threshold`; only the uncertain rest
+# of the batch goes to the full model. The cascade returns log-probabilities
+# (each stage's own temperature applied), so top_k_lists(output, k) works
+# unchanged with temperature 1.
+#
+#   python cascade.py tune validation/ --fast-size 160
+#   python cascade.py tune validation/ --fast crop_classifier_model.mnv3.safetensors
+#   CROP_CASCADE=160 CROP_CASCADE_THRESHOLD=0.3 streamlit run app.py
+import argparse
+import os
+import threading
+
+import torch
+import torch.nn.functional as F
+
+import config
+import metrics
+from evaluation import accuracy, collect_logits, time_forward
+from image_data import list_labeled_images
+from model_registry import MODEL_PATH, get_model
+
+
+class Resized(torch.nn.Module):
+    # Runs `model` on the input downscaled to size x size.
+    def __init__(self, model, size):
+        super().__init__()
+        self.model = model
+        self.size = size
+
+    def forward(self, batch):
+        batch = F.interpolate(batch, size=(self.size, self.size), mode="bilinear", antialias=True, align_corners=False)
+        return self.model(batch)
+
+
+def margin(log_probs):
+    # Top-1 minus top-2 probability per row.
+    top = log_probs.exp().topk(2, dim=1).values
+    return top[:, 0] - top[:, 1]
+
+
+class Cascade:
+    # stages: [(name, model, temperature)], cheapest first, full model last.
+    def __init__(self, stages, threshold):
+        self.stages = stages
+        self.threshold = threshold
+        self.answered = [0] * len(stages)  # images answered by each stage
+        self._lock = threading.Lock()
+
+    @property
+    def tag(self):
+        # Goes into cache keys: another cascade may answer differently.
+        return "cascade:" + ",".join(name for name, _, _ in self.stages) + f"@{self.threshold}"
+
+    def __call__(self, batch):
+        output = None
+        pending = torch.arange(len(batch), device=batch.device)
+        for i, (name, model, temperature) in enumerate(self.stages):
+            with metrics.stage(f"cascade_stage{i}"):
+                log_probs = F.log_softmax(model(batch[pending]).float() / temperature, dim=1)
+            if output is None:
+                output = torch.empty(len(batch), log_probs.shape[1], device=log_probs.device)
+            last = i == len(self.stages) - 1
+            done = torch.ones_like(pending, dtype=torch.bool) if last else margin(log_probs) >= self.threshold
+            output[pending[done]] = log_probs[done]
+            with self._lock:
+                self.answered[i] += int(done.sum())
+            metrics.inc(f"cascade_stage{i}_answered", int(done.sum()))
+            pending = pending[~done]
+            if not len(pending):
+                break
+        return output
+
+    def stats(self):
+        with self._lock:
+            total = sum(self.answered) or 1
+            return {name: round(n / total, 4) for (name, _, _), n in zip(self.stages, self.answered)}
+
+
+def build_cascade(loaded, fast, threshold):
+    # fast: a checkpoint path, or an input size for the full model itself.
+    if fast.isdigit():
+        first = (f"{loaded.architecture}@{fast}", Resized(loaded.model, int(fast)), loaded.temperature)
+    else:
+        small = get_model(fast)
+        # Both stages write into one output by class index
+        if small.class_to_idx != loaded.class_to_idx:
+            raise ValueError(f"cascade first stage {fast} has different classes than the full model")
+        first = (small.architecture, small.model, small.temperature)
+    return Cascade([first, (loaded.architecture, loaded.model, loaded.temperature)], threshold)
+
+
+_lock = threading.Lock()
+_cascades = {}
+
+
+def get_cascade(loaded):
+    # Process-wide cascade from CROP_CASCADE / CROP_CASCADE_THRESHOLD, or None.
+    if not config.CASCADE:
+        return None
+    with _lock:
+        if loaded.tag not in _cascades:
+            _cascades[loaded.tag] = build_cascade(loaded, config.CASCADE, config.CASCADE_THRESHOLD)
+        return _cascades[loaded.tag]
+
+
+def model_tag(loaded):
+    # loaded.tag, extended with the cascade setup when one is configured.
+    cascade = get_cascade(loaded)
+    return f"{loaded.tag}|{cascade.tag}" if cascade else loaded.tag
+
+
+# ---------------------------
+# Threshold tuning
+# ---------------------------
+def simulate(fast_log_probs, full_log_probs, targets, threshold):
+    # Same routing as Cascade.__call__, replayed on precomputed outputs.
+    routed = margin(fast_log_probs) < threshold
+    final = torch.where(routed[:, None], full_log_probs, fast_log_probs)
+    return accuracy(final, targets), 1 - routed.float().mean().item()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tune the confidence threshold of the cascade on a labeled folder.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("tune", help="report accuracy, routing and latency per threshold")
+    p.add_argument("folder", help="labeled validation folder (root/<class name>/*.jpg)")
+    p.add_argument("--model", default=MODEL_PATH, help="full (last stage) checkpoint")
+    p.add_argument("--fast", help="first-stage checkpoint (default: the full model at --fast-size)")
+    p.add_argument("--fast-size", type=int, default=160, help="input size when the first stage is the full model")
+    p.add_argument("--thresholds", nargs="+", type=float, default=[0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.8])
+    p.add_argument("--max-drop", type=float, default=0.005, help="accuracy loss allowed for the suggestion")
+    p.add_argument("--batch-size", type=int, default=64)
+    p.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    args = parser.parse_args(argv)
+
+    loaded = get_model(args.model)
+    cascade = build_cascade(loaded, args.fast or str(args.fast_size), threshold=0.0)
+    (fast_name, fast_model, fast_t), (full_name, full_model, full_t) = cascade.stages
+    paths, labels = list_labeled_images(args.folder, loaded.class_to_idx)
+    if not paths:
+        parser.error(f"no labeled images found in {args.folder}")
+
+    fast_logits, targets = collect_logits(fast_model, paths, labels, args.batch_size, args.workers)
+    full_logits, _ = collect_logits(full_model, paths, labels, args.batch_size, args.workers)
+    fast_log_probs = F.log_softmax(fast_logits / fast_t, dim=1)
+    full_log_probs = F.log_softmax(full_logits / full_t, dim=1)
+    fast_ms, full_ms = time_forward(fast_model, 1), time_forward(full_model, 1)
+    full_acc = accuracy(full_log_probs, targets)
+
+    print(f"{len(targets)} images")
+    print(f"first stage {fast_name}: top-1 {accuracy(fast_log_probs, targets):.2%}, {fast_ms:.2f} ms/image")
+    print(f"full model  {full_name}: top-1 {full_acc:.2%}, {full_ms:.2f} ms/image")
+    print(f"{'threshold':>9} {'top-1':>7} {f'{fast_name} answers':>24} {'ms/image':>9} {'speedup':>8}")
+    best = None
+    for threshold in sorted(args.thresholds):
+        acc, fast_rate = simulate(fast_log_probs, full_log_probs, targets, threshold)
+        # Every image pays the first stage; the routed ones also pay the full model.
+        ms = fast_ms + (1 - fast_rate) * full_ms
+        print(f"{threshold:>9.2f} {acc:>7.2%} {fast_rate:>24.1%} {ms:>9.2f} {full_ms / ms:>7.2f}x")
+        if acc >= full_acc - args.max_drop and (best is None or ms < best[1]):
+            best = (threshold, ms)
+    if best:
+        print(f"Suggested: CROP_CASCADE_THRESHOLD={best[0]} (within {args.max_drop:.1%} of the full model)")
+    else:
+        print(f"No threshold stays within {args.max_drop:.1%} of the full model's accuracy")
+
+
+if __name__ == "__main__":
+    main()
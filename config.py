@@ -0,0 +1,76 @@
+# config.py
+# Runtime settings, read once from environment variables at startup.
+import os
+
+# Checkpoint to serve. Empty means: pick the best available file (see
+# model_registry.default_model_path).
+MODEL_PATH = os.environ.get("CROP_MODEL_PATH", "")
+
+# "fp32" serves the original weights; "int8" serves the post-training
+# quantized model produced by quantization.py (CPU only).
+PRECISION = os.environ.get("CROP_PRECISION", "fp32").lower()
+
+# Inference runtime: "eager", "torchscript" or "onnx" (see backends.py).
+BACKEND = os.environ.get("CROP_BACKEND", "eager").lower()
+
+# Prediction cache (prediction_cache.py). CROP_CACHE_DB enables the SQLite
+# tier so cached predictions survive restarts. CROP_CACHE_ENTRIES=0 turns the
+# cache off, e.g. to load-test the model path itself.
+CACHE_ENTRIES = int(os.environ.get("CROP_CACHE_ENTRIES", 10000))
+CACHE_MB = int(os.environ.get("CROP_CACHE_MB", 64))
+CACHE_DB = os.environ.get("CROP_CACHE_DB", "")
+
+# Decode JPEGs at reduced size and normalize in one step (preprocessing.py).
+# Set to 0 to use the original torchvision transform for every image.
+FAST_DECODE = os.environ.get("CROP_FAST_DECODE", "1") != "0"
+
+# Number of alternatives returned with every prediction (postprocessing.py).
+TOP_K = int(os.environ.get("CROP_TOP_K", 3))
+
+# Instrumentation (metrics.py). CROP_METRICS_PORT serves Prometheus text from
+# the Streamlit process; CROP_PROFILE_RATE (0-1) samples torch profiler traces
+# into CROP_PROFILE_DIR.
+METRICS = os.environ.get("CROP_METRICS", "1") != "0"
+METRICS_PORT = int(os.environ.get("CROP_METRICS_PORT", 0))
+PROFILE_RATE = float(os.environ.get("CROP_PROFILE_RATE", 0))
+PROFILE_DIR = os.environ.get("CROP_PROFILE_DIR", "profiles")
+
+# Torch thread pools (runtime.py). CROP_THREADS=0 sizes intra-op threads to the
+# container CPU quota.
+THREADS = int(os.environ.get("CROP_THREADS", 0))
+INTEROP_THREADS = int(os.environ.get("CROP_INTEROP_THREADS", 1))
+
+# Keep conv weights and inputs in channels-last layout (faster oneDNN kernels).
+# Costs a private copy of the mmap'd conv weights per process; 0 keeps them shared.
+CHANNELS_LAST = os.environ.get("CROP_CHANNELS_LAST", "1") != "0"
+
+# Reference embedding index built by embeddings.py. When set, the app shows
+# look-alike reference images and flags uploads whose best cosine similarity
+# is below CROP_OOD_THRESHOLD as unlike anything in the reference set.
+EMBEDDING_INDEX = os.environ.get("CROP_EMBEDDING_INDEX", "")
+OOD_THRESHOLD = float(os.environ.get("CROP_OOD_THRESHOLD", 0.5))
+
+# Language of crop descriptions (catalog/<language>.json; English fallback).
+LANGUAGE = os.environ.get("CROP_LANGUAGE", "en")
+
+# Test-time augmentation views per upload (1 = off, up to 8); the views run as
+# one batched forward pass and their logits are averaged.
+TTA_VIEWS = int(os.environ.get("CROP_TTA_VIEWS", 1))
+
+# Multi-image uploads in the app: images in flight across all sessions before
+# new uploads are turned away, decode threads, and model batch size.
+JOB_QUEUE_SIZE = int(os.environ.get("CROP_JOB_QUEUE", 64))
+DECODE_WORKERS = int(os.environ.get("CROP_DECODE_WORKERS", 2))
+JOB_BATCH_SIZE = int(os.environ.get("CROP_JOB_BATCH_SIZE", 16))
+
+# Cascade inference: a first stage answers when its top-1 minus top-2
+# probability is >= CROP_CASCADE_THRESHOLD; the rest go to the full model.
+# CROP_CASCADE is an input size for the full model itself (e.g. 160) or a
+# small checkpoint path; empty = off. Tune with `python cascade.py tune`.
+CASCADE = os.environ.get("CROP_CASCADE", "")
+CASCADE_THRESHOLD = float(os.environ.get("CROP_CASCADE_THRESHOLD", 0.3))
+
+# Input resolution: 0 keeps the original 224x224 resize (aspect ratio not
+# kept); 160, 192, 224 or 288 resize the shorter side and center-crop to that
+# size. Lower is faster; see `python -m benchmarks.resolution` for the curve.
+RESOLUTION = int(os.environ.get("CROP_RESOLUTION", 0))
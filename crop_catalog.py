@@ -0,0 +1,116 @@
+# crop_catalog.py
+# Crop metadata (names, summaries, descriptions) kept in catalog/<language>.json
+# rather than in app.py. A catalog is loaded once per (language, class set)
+# into a tuple aligned with the model's class indices, so lookups are
+# catalog[class_index] and a renamed class is caught at startup instead of
+# silently showing no description.
+#
+#   python crop_catalog.py --check            # validate against the checkpoint
+#   CROP_LANGUAGE=es streamlit run app.py     # catalog/es.json, English fallback
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+from dataclasses import dataclass
+
+import config
+
+logger = logging.getLogger(__name__)
+
+CATALOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "catalog")
+DEFAULT_LANGUAGE = "en"
+
+
+@dataclass(frozen=True)
+class CropInfo:
+    class_name: str
+    common_name: str
+    summary: str
+    description: str
+
+
+class CropCatalog:
+    # entries[i] describes class index i (None when the catalog lacks it).
+    def __init__(self, entries, language, missing=(), unknown=()):
+        self.entries = tuple(entries)
+        self.language = language
+        self.missing = tuple(missing)  # class names with no catalog entry
+        self.unknown = tuple(unknown)  # catalog entries that match no class
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getitem__(self, class_index):
+        return self.entries[class_index]
+
+
+def available_languages():
+    return sorted(name[: -len(".json")] for name in os.listdir(CATALOG_DIR) if name.endswith(".json"))
+
+
+def read_entries(language):
+    # class name -> CropInfo for one language file.
+    with open(os.path.join(CATALOG_DIR, f"{language}.json"), encoding="utf-8") as f:
+        data = json.load(f)
+    return {crop["class_name"]: CropInfo(**crop) for crop in data["crops"]}
+
+
+def build_catalog(class_to_idx, language=DEFAULT_LANGUAGE):
+    entries = read_entries(DEFAULT_LANGUAGE)
+    if language != DEFAULT_LANGUAGE:
+        # Untranslated crops fall back to the English entry
+        entries = {**entries, **read_entries(language)}
+    aligned = [None] * (max(class_to_idx.values(), default=-1) + 1)
+    for name, idx in class_to_idx.items():
+        aligned[idx] = entries.get(name)
+    missing = sorted(name for name in class_to_idx if name not in entries)
+    unknown = sorted(name for name in entries if name not in class_to_idx)
+    return CropCatalog(aligned, language, missing, unknown)
+
+
+_lock = threading.Lock()
+_catalogs = {}
+
+
+def get_catalog(class_to_idx, language=None):
+    # Loaded once per process and language, like the model registry.
+    language = language or config.LANGUAGE
+    if language not in available_languages():
+        logger.warning("no crop catalog for language %r, using %r", language, DEFAULT_LANGUAGE)
+        language = DEFAULT_LANGUAGE
+    key = (language, tuple(sorted(class_to_idx.items())))
+    with _lock:
+        if key not in _catalogs:
+            catalog = build_catalog(class_to_idx, language)
+            if catalog.missing:
+                logger.warning("crop catalog has no entry for %d classes: %s", len(catalog.missing), catalog.missing)
+            if catalog.unknown:
+                logger.warning("crop catalog entries match no class: %s", catalog.unknown)
+            _catalogs[key] = catalog
+        return _catalogs[key]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate the crop catalog against a checkpoint's classes.")
+    parser.add_argument("--check", action="store_true", help="exit non-zero if any class lacks an entry")
+    parser.add_argument("--model", default=config.MODEL_PATH, help="checkpoint path (default: auto-detected)")
+    parser.add_argument("--language", default=config.LANGUAGE)
+    args = parser.parse_args(argv)
+
+    from model_registry import MODEL_PATH, get_model
+
+    loaded = get_model(args.model or MODEL_PATH)
+    catalog = build_catalog(loaded.class_to_idx, args.language)
+    print(f"{len(catalog) - len(catalog.missing)}/{len(catalog)} classes described ({catalog.language})")
+    for name in catalog.missing:
+        print(f"missing: {name}")
+    for name in catalog.unknown:
+        print(f"unknown: {name}")
+    if args.check and (catalog.missing or catalog.unknown):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
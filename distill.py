@@ -0,0 +1,174 @@
+# distill.py
+# Knowledge distillation into a smaller architecture for CPU serving. The
+# current checkpoint (ResNet-18) is the teacher; the student learns from its
+# temperature-softened outputs on augmented images, plus the folder labels
+# when the images are labeled. `report` compares the two on a held-out folder.
+#
+#   python distill.py train dataset/ --student mobilenet_v3_large -o crop_classifier_model.mnv3.safetensors
+#   python distill.py report heldout/ --student crop_classifier_model.mnv3.safetensors
+#   CROP_MODEL_PATH=crop_classifier_model.mnv3.safetensors streamlit run app.py
+import argparse
+import os
+import time
+
+import torch
+import torch.nn.functional as F
+import torchvision.transforms as transforms
+
+import weights_io
+from evaluation import accuracy, collect_logits, time_forward
+from image_data import image_loader, list_images, list_labeled_images
+from model_registry import ARCHITECTURES, MODEL_PATH, build_model, get_model, select_device
+from preprocessing import MEAN, STD
+
+train_transform = transforms.Compose(
+    [
+        transforms.RandomResizedCrop(224, scale=(0.5, 1.0)),
+        transforms.RandomHorizontalFlip(),
+        transforms.ToTensor(),
+        transforms.Normalize(MEAN, STD),
+    ]
+)
+
+
+def distillation_loss(student_logits, teacher_logits, targets=None, temperature=4.0, alpha=0.7):
+    # Hinton et al.: KL between softened distributions, scaled by T^2, mixed
+    # with cross-entropy on the hard labels (targets < 0 are unlabeled).
+    soft = F.kl_div(
+        F.log_softmax(student_logits / temperature, dim=1),
+        F.log_softmax(teacher_logits / temperature, dim=1),
+        reduction="batchmean",
+        log_target=True,
+    ) * temperature**2
+    if targets is None or not (targets >= 0).any():
+        return soft
+    labeled = targets >= 0
+    hard = F.cross_entropy(student_logits[labeled], targets[labeled])
+    return alpha * soft + (1 - alpha) * hard
+
+
+def distill(teacher, student, loader, label_of, epochs=10, lr=1e-3, temperature=4.0, alpha=0.7, device=None):
+    # Trains `student` in place on the teacher's device; returns the mean loss per epoch.
+    device = device or select_device()
+    student.to(device)
+    optimizer = torch.optim.AdamW(student.parameters(), lr=lr, weight_decay=1e-4)
+    scheduler = torch.optim.lr_scheduler.CosineAnnealingLR(optimizer, epochs * len(loader))
+    history = []
+    for epoch in range(epochs):
+        student.train()
+        total, count, start = 0.0, 0, time.perf_counter()
+        for paths, batch, _ in loader:
+            if batch is None:
+                continue
+            batch = batch.to(device, non_blocking=True)
+            targets = torch.tensor([label_of.get(path, -1) for path in paths], device=device)
+            with torch.no_grad():
+                teacher_logits = teacher(batch).float()
+            loss = distillation_loss(student(batch), teacher_logits, targets, temperature, alpha)
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            scheduler.step()
+            total += loss.item() * len(paths)
+            count += len(paths)
+        history.append(total / max(1, count))
+        print(f"epoch {epoch + 1:>3}: loss {history[-1]:.4f} ({time.perf_counter() - start:.0f}s)")
+    return history
+
+
+# ---------------------------
+# CLI
+# ---------------------------
+def train_command(args):
+    teacher_entry = get_model(args.teacher, backend="eager")
+    teacher = teacher_entry.model
+    class_to_idx = teacher_entry.class_to_idx
+
+    paths, labels = list_labeled_images(args.folder, class_to_idx)
+    if not paths:  # unlabeled images: soft targets only
+        paths, labels = list_images(args.folder), []
+    if not paths:
+        raise SystemExit(f"no images found in {args.folder}")
+    label_of = dict(zip(paths, labels))
+
+    student = build_model(len(class_to_idx), args.student, weights="DEFAULT" if args.pretrained else None)
+    loader = image_loader(
+        paths, args.batch_size, args.workers, train_transform, pin_memory=torch.cuda.is_available(), shuffle=True
+    )
+    print(f"Distilling {teacher_entry.architecture} -> {args.student} on {len(paths)} images ({len(labels)} labeled)")
+    distill(
+        teacher, student, loader, label_of, args.epochs, args.lr, args.temperature, args.alpha, teacher_entry.device
+    )
+
+    weights_io.save_checkpoint(
+        args.output,
+        {name: tensor.cpu() for name, tensor in student.state_dict().items()},
+        class_to_idx,
+        architecture=args.student,
+        distilled_from=args.teacher,
+    )
+    print(f"Wrote {args.output}")
+
+
+def report_command(args):
+    teacher = get_model(args.teacher, backend="eager")
+    student = get_model(args.student, backend="eager")
+    paths, labels = list_labeled_images(args.folder, teacher.class_to_idx)
+    if not paths:
+        raise SystemExit(f"no labeled images found in {args.folder}")
+
+    teacher_logits, targets = collect_logits(teacher.model, paths, labels, args.batch_size, args.workers)
+    student_logits, _ = collect_logits(student.model, paths, labels, args.batch_size, args.workers)
+    agreement = (teacher_logits.argmax(1) == student_logits.argmax(1)).float().mean().item()
+
+    print(f"{len(targets)} images, top-1 agreement {agreement:.4f}")
+    print(
+        f"{'model':<20} {'top-1':>7} {'bs=1 ms':>8} {f'bs={args.batch_size} img/s':>12} "
+        f"{'params MB':>10} {'file MB':>8}"
+    )
+    for entry, logits, path in ((teacher, teacher_logits, args.teacher), (student, student_logits, args.student)):
+        single = time_forward(entry.model, 1)
+        batched = time_forward(entry.model, args.batch_size)
+        print(
+            f"{entry.architecture:<20} {accuracy(logits, targets):>7.2%} {single:>8.2f} "
+            f"{args.batch_size * 1000 / batched:>12.1f} {entry.param_bytes / 2**20:>10.1f} "
+            f"{os.path.getsize(path) / 2**20:>8.1f}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Distill the classifier into a smaller architecture.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("train", help="train a student on a folder of images (labeled or not)")
+    p.add_argument("folder")
+    p.add_argument("--student", choices=list(ARCHITECTURES), default="mobilenet_v3_large")
+    p.add_argument("-o", "--output", default="crop_classifier_model.student.safetensors")
+    p.add_argument(
+        "--pretrained",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="start the student from torchvision's ImageNet weights",
+    )
+    p.add_argument("--epochs", type=int, default=10)
+    p.add_argument("--lr", type=float, default=1e-3)
+    p.add_argument("--temperature", type=float, default=4.0)
+    p.add_argument("--alpha", type=float, default=0.7, help="weight of the soft (teacher) loss")
+    p.add_argument("--batch-size", type=int, default=64)
+    p.set_defaults(func=train_command)
+
+    p = sub.add_parser("report", help="compare student and teacher accuracy, latency and size")
+    p.add_argument("folder", help="held-out labeled folder (root/<class name>/*.jpg)")
+    p.add_argument("--student", required=True, help="student checkpoint")
+    p.add_argument("--batch-size", type=int, default=32)
+    p.set_defaults(func=report_command)
+
+    for p in sub.choices.values():
+        p.add_argument("--teacher", default=MODEL_PATH, help="teacher checkpoint")
+        p.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
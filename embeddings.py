@@ -0,0 +1,226 @@
+# embeddings.py
+# Penultimate-layer embeddings and a compact nearest-neighbour index for
+# look-alike examples and cheap out-of-distribution checks.
+#
+#   python embeddings.py build reference_images/ -o reference_index.npz --dtype int8
+#   python embeddings.py query leaf.jpg --index reference_index.npz -k 5
+#   CROP_EMBEDDING_INDEX=reference_index.npz streamlit run app.py
+import argparse
+import os
+import threading
+
+import numpy as np
+import torch
+
+from image_data import image_loader, list_images, list_labeled_images
+from model_registry import MODEL_PATH, get_model
+from preprocessing import preprocess
+
+_local = threading.local()
+_hook_lock = threading.Lock()
+_index_lock = threading.Lock()
+
+
+# ---------------------------
+# Feature extraction
+# ---------------------------
+def classifier_head(model):
+    # The last Linear layer; its input is the embedding (512-d for ResNet-18).
+    if not isinstance(model, torch.nn.Module) or isinstance(model, torch.jit.ScriptModule):
+        raise ValueError("embeddings need the eager backend (CROP_BACKEND=eager)")
+    linears = [m for m in model.modules() if isinstance(m, torch.nn.Linear)]
+    if not linears:
+        raise ValueError("model has no Linear classifier head")
+    return linears[-1]
+
+
+def _capture(module, args):
+    if getattr(_local, "capture", False):
+        _local.features = args[0]
+
+
+def extract(model, batch):
+    # One forward pass -> (logits, embeddings). The hook is installed once and
+    # only records for the calling thread, so shared models stay thread-safe.
+    head = classifier_head(model)
+    with _hook_lock:
+        if not getattr(head, "_embedding_hook", False):
+            head.register_forward_pre_hook(_capture)
+            head._embedding_hook = True
+    _local.capture = True
+    try:
+        logits = model(batch)
+        return logits, _local.features
+    finally:
+        _local.capture = False
+        _local.features = None
+
+
+def normalize(features):
+    return torch.nn.functional.normalize(features.float(), dim=1)
+
+
+# ---------------------------
+# Index
+# ---------------------------
+def kmeans(vectors, k, iterations=10, seed=0):
+    generator = torch.Generator().manual_seed(seed)
+    centroids = vectors[torch.randperm(len(vectors), generator=generator)[:k]].clone()
+    for _ in range(iterations):
+        assignments = (vectors @ centroids.T).argmax(1)
+        for c in range(len(centroids)):
+            members = vectors[assignments == c]
+            if len(members):
+                centroids[c] = members.mean(0)
+        centroids = normalize(centroids)
+    return centroids
+
+
+class EmbeddingIndex:
+    # Unit-length vectors stored as float16, or int8 with one scale per row.
+    # search() is a brute-force matmul; with `lists` > 0 an IVF layer limits
+    # each query to the `nprobe` closest clusters.
+    def __init__(self, vectors, paths, labels=None, dtype="float16", lists=0):
+        vectors = normalize(vectors)
+        self.paths = list(paths)
+        self.labels = torch.as_tensor(labels if labels is not None else [-1] * len(self.paths))
+        self.dtype = dtype
+        if dtype == "int8":
+            self.scale = vectors.abs().amax(1).clamp_min(1e-8) / 127
+            self.data = torch.round(vectors / self.scale[:, None]).to(torch.int8)
+        else:
+            self.scale = None
+            self.data = vectors.half()
+        self.centroids = self.assignments = None
+        if lists:
+            self.centroids = kmeans(vectors, min(lists, len(vectors)))
+            self.assignments = (vectors @ self.centroids.T).argmax(1)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def _scores(self, queries, rows=None):
+        data = self.data if rows is None else self.data[rows]
+        scores = queries @ data.float().T
+        if self.scale is not None:
+            scores *= self.scale if rows is None else self.scale[rows]
+        return scores
+
+    def search(self, queries, k=5, nprobe=4):
+        # queries: (M, D) embeddings. Returns (cosine similarities, row indices), (M, k).
+        queries = normalize(queries)
+        k = min(k, len(self))
+        if self.centroids is None:
+            return self._scores(queries).topk(k, dim=1)
+        all_scores, all_rows = [], []
+        for query in queries:
+            clusters = (self.centroids @ query).topk(min(nprobe, len(self.centroids))).indices
+            rows = torch.isin(self.assignments, clusters).nonzero().flatten()
+            scores, best = self._scores(query[None], rows)[0].topk(min(k, len(rows)))
+            pad = k - len(best)
+            all_scores.append(torch.cat([scores, torch.full((pad,), -1.0)]))
+            all_rows.append(torch.cat([rows[best], torch.full((pad,), -1, dtype=torch.long)]))
+        return torch.stack(all_scores), torch.stack(all_rows)
+
+    def save(self, path):
+        arrays = {"data": self.data.numpy(), "paths": np.array(self.paths), "labels": self.labels.numpy()}
+        if self.scale is not None:
+            arrays["scale"] = self.scale.numpy()
+        if self.centroids is not None:
+            arrays["centroids"] = self.centroids.numpy()
+            arrays["assignments"] = self.assignments.numpy()
+        # np.savez(path) would append ".npz" to other names; write exactly `path`
+        with open(path, "wb") as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        arrays = np.load(path)
+        index = cls.__new__(cls)
+        index.data = torch.from_numpy(arrays["data"])
+        index.dtype = "int8" if index.data.dtype == torch.int8 else "float16"
+        index.paths = arrays["paths"].tolist()
+        index.labels = torch.from_numpy(arrays["labels"])
+        index.scale = torch.from_numpy(arrays["scale"]) if "scale" in arrays else None
+        index.centroids = torch.from_numpy(arrays["centroids"]) if "centroids" in arrays else None
+        index.assignments = torch.from_numpy(arrays["assignments"]) if "assignments" in arrays else None
+        return index
+
+
+_indexes = {}
+
+
+def get_index(path):
+    # Loaded once per process, like the model registry.
+    with _index_lock:
+        if path not in _indexes:
+            _indexes[path] = EmbeddingIndex.load(path)
+        return _indexes[path]
+
+
+# ---------------------------
+# CLI
+# ---------------------------
+def build(args):
+    loaded = get_model(args.model)
+    paths, labels = list_labeled_images(args.folder, loaded.class_to_idx)
+    if not paths:  # not a class-per-folder layout
+        paths = list_images(args.folder)
+        labels = [-1] * len(paths)
+    label_of = dict(zip(paths, labels))
+
+    kept, features = [], []
+    with torch.inference_mode():
+        for batch_paths, batch, _ in image_loader(paths, args.batch_size, args.workers):
+            if batch is not None:
+                _, emb = extract(loaded.model, loaded.to_device(batch))
+                features.append(normalize(emb).half().cpu())
+                kept.extend(batch_paths)
+    index = EmbeddingIndex(
+        torch.cat(features).float(), kept, [label_of[p] for p in kept], args.dtype, args.ivf_lists
+    )
+    index.save(args.output)
+    vector_bytes = index.data.element_size() * index.data.shape[1]
+    print(f"Indexed {len(index)} images ({vector_bytes} bytes/vector) -> {args.output}")
+
+
+def query(args):
+    loaded = get_model(args.model)
+    index = EmbeddingIndex.load(args.index)
+    with torch.inference_mode():
+        logits, emb = extract(loaded.model, loaded.to_device(preprocess(args.image).unsqueeze(0)))
+    scores, rows = index.search(emb.cpu(), args.k, args.nprobe)
+    print(f"Predicted: {loaded.idx_to_class[logits.argmax(1).item()]}")
+    for score, row in zip(scores[0].tolist(), rows[0].tolist()):
+        if row >= 0:
+            print(f"{score:.3f}  {index.paths[row]}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and query an embedding index of reference images.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("build", help="index a folder of reference images")
+    p.add_argument("folder")
+    p.add_argument("-o", "--output", default="reference_index.npz")
+    p.add_argument("--dtype", choices=["float16", "int8"], default="float16")
+    p.add_argument("--ivf-lists", type=int, default=0, help="clusters for approximate search (0 = exact)")
+    p.add_argument("--batch-size", type=int, default=64)
+    p.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    p.set_defaults(func=build)
+
+    p = sub.add_parser("query", help="find reference images similar to one photo")
+    p.add_argument("image")
+    p.add_argument("--index", default="reference_index.npz")
+    p.add_argument("-k", type=int, default=5)
+    p.add_argument("--nprobe", type=int, default=4, help="clusters searched with an IVF index")
+    p.set_defaults(func=query)
+
+    for p in sub.choices.values():
+        p.add_argument("--model", default=MODEL_PATH)
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# evaluation.py
+# Accuracy and latency helpers for comparing model variants on labeled folders.
+import itertools
+import statistics
+import time
+
+import torch
+
+from image_data import image_loader
+
+
+def model_device(model):
+    # Device of the first parameter/buffer; CPU for ONNX Runtime and frozen graphs.
+    if isinstance(model, torch.nn.Module):
+        for tensor in itertools.chain(model.parameters(), model.buffers()):
+            return tensor.device
+    return torch.device("cpu")
+
+
+def collect_logits(model, paths, labels, batch_size=64, workers=4, device=None, transform=None):
+    # Runs every readable image through the model; returns (logits, targets).
+    device = device or model_device(model)
+    label_of = dict(zip(paths, labels))
+    logits, targets, failed = [], [], []
+    with torch.inference_mode():
+        for batch_paths, batch, batch_failed in image_loader(paths, batch_size, workers, transform):
+            failed.extend(batch_failed)
+            if batch is None:
+                continue
+            logits.append(model(batch.to(device)).float().cpu())
+            targets.extend(label_of[path] for path in batch_paths)
+    if not logits:
+        names = ", ".join(path for path, _ in failed[:5]) + (f" and {len(failed) - 5} more" if len(failed) > 5 else "")
+        raise ValueError(f"none of the {len(paths)} images could be read: {names or 'no images given'}")
+    return torch.cat(logits), torch.tensor(targets)
+
+
+def accuracy(logits, targets):
+    if not len(targets):
+        return 0.0
+    return (logits.argmax(1) == targets).float().mean().item()
+
+
+def time_forward(model, batch_size, device=None, repeats=20, warmup=3, size=224):
+    # Median wall time of one forward pass, in milliseconds.
+    device = device or model_device(model)
+    batch = torch.randn(batch_size, 3, size, size, device=device)
+    timings = []
+    with torch.inference_mode():
+        for i in range(warmup + repeats):
+            start = time.perf_counter()
+            model(batch)
+            if torch.device(device).type == "cuda":
+                torch.cuda.synchronize()
+            if i >= warmup:
+                timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def expected_calibration_error(logits, targets, bins=15):
+    confidence, predicted = torch.softmax(logits.float(), dim=1).max(1)
+    correct = (predicted == targets).float()
+    edges = torch.linspace(0, 1, bins + 1)
+    ece = 0.0
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        in_bin = (confidence > lo) & (confidence <= hi)
+        if in_bin.any():
+            ece += in_bin.float().mean().item() * abs(
+                confidence[in_bin].mean().item() - correct[in_bin].mean().item()
+            )
+    return ece
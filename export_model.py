@@ -0,0 +1,86 @@
+# export_model.py
+# Export the classifier to TorchScript and ONNX, then check that every backend
+# predicts the same top-1 class as eager PyTorch.
+#
+#   python export_model.py                       # both formats + parity check on random inputs
+#   python export_model.py --check sample_images/
+#   CROP_BACKEND=onnx streamlit run app.py
+import argparse
+import os
+import sys
+
+import torch
+
+import backends
+import weights_io
+from image_data import image_loader, list_images
+from model_registry import MODEL_PATH, get_model
+
+
+def parity_inputs(folder=None, limit=256, batch_size=32):
+    if folder is None:
+        generator = torch.Generator().manual_seed(0)
+        return [torch.randn(batch_size, 3, 224, 224, generator=generator) for _ in range(limit // batch_size)]
+    paths = list_images(folder)[:limit]
+    return [batch for _, batch, _ in image_loader(paths, batch_size, workers=0) if batch is not None]
+
+
+def check_parity(reference, candidates, batches):
+    # Returns {backend: (top-1 agreement, max abs logit difference)}.
+    results = {}
+    with torch.inference_mode():
+        expected = [reference(batch) for batch in batches]
+        for name, model in candidates.items():
+            agree = total = 0
+            max_diff = 0.0
+            for batch, ref in zip(batches, expected):
+                out = model(batch).float()
+                agree += (out.argmax(1) == ref.argmax(1)).sum().item()
+                total += len(batch)
+                max_diff = max(max_diff, (out - ref).abs().max().item())
+            results[name] = (agree / total, max_diff)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the crop classifier to TorchScript and ONNX.")
+    parser.add_argument("--model", default=MODEL_PATH, help="checkpoint (.pkl or .safetensors)")
+    parser.add_argument("--formats", nargs="+", choices=["torchscript", "onnx"], default=["torchscript", "onnx"])
+    parser.add_argument("--check", metavar="FOLDER", help="images for the parity check (default: random inputs)")
+    args = parser.parse_args(argv)
+
+    loaded = get_model(args.model, backend="eager")
+    stem = os.path.splitext(args.model)[0]
+    candidates = {}
+
+    if "torchscript" in args.formats:
+        path = stem + ".torchscript.pt"
+        torch.jit.save(backends.to_torchscript(loaded.model), path)
+        weights_io.save_sidecar(
+            path, loaded.class_to_idx, format="torchscript", architecture=loaded.architecture
+        )
+        candidates["torchscript"] = torch.jit.load(path)
+        print(f"Wrote {path}")
+
+    if "onnx" in args.formats:
+        path = stem + ".onnx"
+        backends.export_onnx(loaded.model, path)
+        if not os.path.exists(weights_io.sidecar_path(path)):
+            weights_io.save_sidecar(path, loaded.class_to_idx, architecture=loaded.architecture)
+        print(f"Wrote {path}")
+        try:
+            candidates["onnx"] = backends.OnnxRuntimeModel(path)
+        except ImportError as e:
+            print(f"Skipping ONNX parity check: {e}")
+
+    results = check_parity(loaded.model, candidates, parity_inputs(args.check))
+    ok = True
+    for name, (agreement, max_diff) in results.items():
+        print(f"{name:<12} top-1 agreement {agreement:.4f}, max |logit diff| {max_diff:.2e}")
+        ok = ok and agreement == 1.0
+    if not ok:
+        sys.exit("Parity check failed: top-1 predictions differ from eager PyTorch")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+# finetune_head.py
+# Retrains only the classifier head (model.fc, or the final Linear layer of
+# other architectures) from cached backbone features.
+# The backbone runs once per image and its 512-d features are stored in
+# memory-mapped float16 shards; training the head on them takes seconds on a
+# CPU. New class folders extend class_to_idx (existing indices are kept) and
+# the result is a regular checkpoint the model registry loads as usual.
+#
+#   python finetune_head.py cache dataset/ --cache-dir feature_cache/
+#   python finetune_head.py cache new_crops/ --cache-dir feature_cache/   # only new images
+#   python finetune_head.py train --cache-dir feature_cache/ -o crop_classifier_model.v2.safetensors
+import argparse
+import json
+import os
+import time
+
+import joblib
+import numpy as np
+import torch
+
+import weights_io
+from embeddings import extract
+from image_data import image_loader, list_labeled_images
+from model_registry import ARCHITECTURES, MODEL_PATH, get_model, read_checkpoint_metadata
+
+MANIFEST = "manifest.json"
+
+
+# ---------------------------
+# Feature cache
+# ---------------------------
+def read_manifest(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"backbone": None, "dim": None, "shards": []}
+
+
+def write_manifest(cache_dir, manifest):
+    tmp = os.path.join(cache_dir, MANIFEST + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp, os.path.join(cache_dir, MANIFEST))
+
+
+def extend_classes(class_to_idx, class_names):
+    # New class names get the next free indices; existing ones keep theirs.
+    extended = dict(class_to_idx)
+    for name in sorted(class_names):
+        if name not in extended:
+            extended[name] = len(extended)
+    return extended
+
+
+def cache_features(folder, cache_dir, model_path=MODEL_PATH, batch_size=64, workers=4):
+    # Appends one shard with the images under `folder` that are not cached yet.
+    # Returns the number of images added.
+    os.makedirs(cache_dir, exist_ok=True)
+    manifest = read_manifest(cache_dir)
+    if manifest["backbone"] not in (None, model_path):
+        raise ValueError(f"{cache_dir} holds features of {manifest['backbone']}, not {model_path}")
+    cached = {path for shard in manifest["shards"] for path in shard["paths"]}
+
+    loaded = get_model(model_path, backend="eager")
+    class_names = [name for name in os.listdir(folder) if os.path.isdir(os.path.join(folder, name))]
+    class_to_idx = extend_classes(loaded.class_to_idx, class_names)
+    idx_to_class = {v: k for k, v in class_to_idx.items()}
+    paths, labels = list_labeled_images(folder, class_to_idx)
+    todo = [(p, l) for p, l in zip(paths, labels) if p not in cached]
+    if not todo:
+        return 0
+    label_of = dict(todo)
+
+    features, kept = [], []
+    with torch.inference_mode():
+        for batch_paths, batch, failed in image_loader([p for p, _ in todo], batch_size, workers):
+            for path, error in failed:
+                print(f"skipped {path}: {error}")
+            if batch is not None:
+                _, emb = extract(loaded.model, loaded.to_device(batch))
+                features.append(emb.half().cpu().numpy())
+                kept.extend(batch_paths)
+    if not kept:
+        return 0
+
+    name = f"shard-{len(manifest['shards']):05d}.npy"
+    array = np.lib.format.open_memmap(
+        os.path.join(cache_dir, name), mode="w+", dtype=np.float16, shape=(len(kept), features[0].shape[1])
+    )
+    array[:] = np.concatenate(features)
+    array.flush()
+    manifest["backbone"], manifest["dim"] = model_path, array.shape[1]
+    manifest["shards"].append({"file": name, "paths": kept, "labels": [idx_to_class[label_of[p]] for p in kept]})
+    write_manifest(cache_dir, manifest)
+    return len(kept)
+
+
+def load_features(cache_dir):
+    # Returns (features float32 (N, D), class names per row, manifest).
+    manifest = read_manifest(cache_dir)
+    if not manifest["shards"]:
+        raise FileNotFoundError(f"no cached features in {cache_dir}; run the cache command first")
+    shards = [np.load(os.path.join(cache_dir, shard["file"]), mmap_mode="r") for shard in manifest["shards"]]
+    features = torch.from_numpy(np.concatenate(shards)).float()
+    names = [name for shard in manifest["shards"] for name in shard["labels"]]
+    return features, names, manifest
+
+
+# ---------------------------
+# Head training
+# ---------------------------
+def init_head(fc_weight, fc_bias, num_classes):
+    # Existing classes start from the trained head; new rows start small.
+    head = torch.nn.Linear(fc_weight.shape[1], num_classes)
+    with torch.no_grad():
+        torch.nn.init.normal_(head.weight, std=0.01)
+        head.bias.zero_()
+        head.weight[: len(fc_weight)] = fc_weight
+        head.bias[: len(fc_bias)] = fc_bias
+    return head
+
+
+def train_head(
+    head, features, targets, epochs=30, lr=1e-3, batch_size=256, weight_decay=1e-4, val_fraction=0.1, seed=0
+):
+    # Adam + cross-entropy (as in the original training) on cached features.
+    # Returns per-epoch [train loss, validation accuracy].
+    generator = torch.Generator().manual_seed(seed)
+    order = torch.randperm(len(targets), generator=generator)
+    n_val = int(len(order) * val_fraction)
+    val, train = order[:n_val], order[n_val:]
+    optimizer = torch.optim.Adam(head.parameters(), lr=lr, weight_decay=weight_decay)
+    history = []
+    for _ in range(epochs):
+        head.train()
+        total = 0.0
+        for batch in train[torch.randperm(len(train), generator=generator)].split(batch_size):
+            optimizer.zero_grad()
+            loss = torch.nn.functional.cross_entropy(head(features[batch]), targets[batch])
+            loss.backward()
+            optimizer.step()
+            total += loss.item() * len(batch)
+        head.eval()
+        with torch.no_grad():
+            val_acc = (head(features[val]).argmax(1) == targets[val]).float().mean().item() if n_val else float("nan")
+        history.append([total / max(1, len(train)), val_acc])
+    return history
+
+
+def save_model(path, state_dict, class_to_idx, **metadata):
+    # Same layouts the registry reads: .safetensors + sidecar, or a joblib .pkl.
+    if path.endswith(".safetensors"):
+        weights_io.save_checkpoint(path, state_dict, class_to_idx, **metadata)
+    else:
+        joblib.dump({"model_state_dict": state_dict, "class_to_idx": class_to_idx, **metadata}, path)
+
+
+# ---------------------------
+# CLI
+# ---------------------------
+def cache_command(args):
+    start = time.perf_counter()
+    added = cache_features(args.folder, args.cache_dir, args.model, args.batch_size, args.workers)
+    print(f"Cached {added} new images in {time.perf_counter() - start:.1f}s -> {args.cache_dir}")
+
+
+def train_command(args):
+    features, names, manifest = load_features(args.cache_dir)
+    state_dict, metadata = read_checkpoint_metadata(manifest["backbone"])
+    prefix = ARCHITECTURES[metadata["architecture"]].head
+    class_to_idx = extend_classes(metadata["class_to_idx"], set(names))
+    targets = torch.tensor([class_to_idx[name] for name in names])
+    added = len(class_to_idx) - len(state_dict[f"{prefix}.bias"])
+
+    start = time.perf_counter()
+    head = init_head(state_dict[f"{prefix}.weight"].float(), state_dict[f"{prefix}.bias"].float(), len(class_to_idx))
+    history = train_head(
+        head, features, targets, args.epochs, args.lr, args.batch_size, args.weight_decay, args.val_fraction
+    )
+    elapsed = time.perf_counter() - start
+    for epoch, (loss, val_acc) in enumerate(history, 1):
+        print(f"epoch {epoch:>3}: loss {loss:.4f}, val accuracy {val_acc:.4f}")
+
+    # Copy the backbone: the output may replace the mmap'd checkpoint it came from.
+    state_dict = {name: tensor.clone() for name, tensor in state_dict.items()}
+    state_dict[f"{prefix}.weight"], state_dict[f"{prefix}.bias"] = head.weight.detach(), head.bias.detach()
+    save_model(
+        args.output,
+        state_dict,
+        class_to_idx,
+        architecture=metadata["architecture"],
+        fine_tuned_from=manifest["backbone"],
+    )
+    print(
+        f"Trained head on {len(targets)} images, {len(class_to_idx)} classes ({added} new) "
+        f"in {elapsed:.1f}s -> {args.output}"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fine-tune the classifier head from cached backbone features.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("cache", help="extract backbone features for a labeled folder (root/<class name>/*.jpg)")
+    p.add_argument("folder")
+    p.add_argument("--cache-dir", default="feature_cache")
+    p.add_argument("--model", default=MODEL_PATH, help="checkpoint whose backbone is used")
+    p.add_argument("--batch-size", type=int, default=64)
+    p.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    p.set_defaults(func=cache_command)
+
+    p = sub.add_parser("train", help="train the classifier head on the cached features and write a checkpoint")
+    p.add_argument("--cache-dir", default="feature_cache")
+    p.add_argument("-o", "--output", default="crop_classifier_model.finetuned.safetensors")
+    p.add_argument("--epochs", type=int, default=30)
+    p.add_argument("--lr", type=float, default=1e-3)
+    p.add_argument("--batch-size", type=int, default=256)
+    p.add_argument("--weight-decay", type=float, default=1e-4)
+    p.add_argument("--val-fraction", type=float, default=0.1)
+    p.set_defaults(func=train_command)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# image_data.py
+# Image discovery and DataLoader datasets shared by the offline tools.
+import os
+
+import torch
+from torch.utils.data import DataLoader, Dataset
+
+from preprocessing import IMAGE_EXTENSIONS, load_image, preprocess
+
+
+# ---------------------------
+# Input discovery
+# ---------------------------
+def list_images(source):
+    # A directory is walked recursively; any other file is read as a list of
+    # image paths, one per line.
+    if os.path.isdir(source):
+        paths = []
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    paths.append(os.path.join(root, name))
+        return paths
+    with open(source) as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def list_labeled_images(root, class_to_idx):
+    # ImageFolder layout: root/<class name>/<image>. Folders whose name is not
+    # a known class are skipped.
+    paths, labels = [], []
+    for class_name in sorted(os.listdir(root)):
+        class_dir = os.path.join(root, class_name)
+        if class_name not in class_to_idx or not os.path.isdir(class_dir):
+            continue
+        for path in list_images(class_dir):
+            paths.append(path)
+            labels.append(class_to_idx[class_name])
+    return paths, labels
+
+
+# ---------------------------
+# Decode/resize pipeline (runs in DataLoader workers)
+# ---------------------------
+class ImagePathDataset(Dataset):
+    # transform=None uses preprocessing.preprocess; otherwise it is applied to
+    # the fully decoded PIL image.
+    def __init__(self, paths, transform=None):
+        self.paths = paths
+        self.transform = transform
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __getitem__(self, i):
+        path = self.paths[i]
+        try:
+            if self.transform is None:
+                return path, preprocess(path), None
+            return path, self.transform(load_image(path)), None
+        except Exception as e:  # unreadable/corrupt files are reported, not fatal
+            return path, None, f"{type(e).__name__}: {e}"
+
+
+def collate(samples):
+    ok = [(path, tensor) for path, tensor, _ in samples if tensor is not None]
+    failed = [(path, error) for path, tensor, error in samples if tensor is None]
+    batch = torch.stack([tensor for _, tensor in ok]) if ok else None
+    return [path for path, _ in ok], batch, failed
+
+
+def image_loader(paths, batch_size=64, workers=4, transform=None, pin_memory=False, shuffle=False):
+    # shuffle=True reorders every epoch, for training; workers persist across epochs.
+    return DataLoader(
+        ImagePathDataset(paths, transform),
+        batch_size=batch_size,
+        shuffle=shuffle,
+        num_workers=workers,
+        collate_fn=collate,
+        pin_memory=pin_memory,
+        prefetch_factor=4 if workers > 0 else None,
+        persistent_workers=shuffle and workers > 0,
+    )
@@ -0,0 +1,94 @@
+# inference_jobs.py
+# Background inference for the Streamlit app. Uploads are decoded on a small
+# thread pool and their tensors go through a shared micro-batcher, so images
+# from every session are classified together and the script thread only polls
+# futures. A process-wide bound on in-flight images provides backpressure:
+# submit() raises QueueFull instead of letting sessions pile up work.
+#
+#   jobs = get_jobs(loaded)
+#   future = jobs.submit(image_bytes)  # -> [[class_index, probability], ...]
+import io
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import config
+import metrics
+from batch_inference import make_predict_batch
+from cascade import model_tag
+from micro_batcher import MicroBatcher
+from prediction_cache import get_cache
+from preprocessing import preprocess
+
+
+class QueueFull(Exception):
+    pass
+
+
+class InferenceJobs:
+    def __init__(self, loaded, k=config.TOP_K, capacity=64, decode_workers=2, max_batch_size=16, max_wait_ms=5.0):
+        self.capacity = capacity
+        self._slots = threading.BoundedSemaphore(capacity)
+        self._decode = ThreadPoolExecutor(decode_workers, thread_name_prefix="job-decode")
+        self._batcher = MicroBatcher(make_predict_batch(loaded, k), max_batch_size, max_wait_ms)
+        self._cache = get_cache()
+        self._tag = f"{model_tag(loaded)}|top{k}"
+
+    def submit(self, data, resolution=None):
+        # Never blocks: raises QueueFull when `capacity` images are in flight.
+        # resolution: see preprocessing.RESOLUTIONS (None = CROP_RESOLUTION).
+        resolution = config.RESOLUTION if resolution is None else resolution
+        key = self._cache.key(data, f"{self._tag}|res{resolution}")
+        future = Future()
+        top = self._cache.get(key)
+        if top is not None:
+            metrics.inc("cache_hits")
+            future.set_result(top)
+            return future
+        if not self._slots.acquire(blocking=False):
+            metrics.inc("jobs_rejected")
+            raise QueueFull(f"{self.capacity} images already queued")
+        future.add_done_callback(self._release)
+        self._decode.submit(self._run, data, resolution, key, future)
+        return future
+
+    def _release(self, _):
+        self._slots.release()
+
+    def _run(self, data, resolution, key, future):
+        # Decode here, then hand the tensor to the batcher and return at once.
+        metrics.inc("requests")
+        try:
+            tensor = preprocess(io.BytesIO(data), resolution)
+        except Exception as e:  # unreadable image
+            metrics.inc("request_errors")
+            future.set_exception(e)
+            return
+
+        def done(batched):
+            if batched.exception() is not None:
+                metrics.inc("request_errors")
+                future.set_exception(batched.exception())
+            else:
+                self._cache.put(key, batched.result())
+                future.set_result(batched.result())
+
+        self._batcher.submit(tensor).add_done_callback(done)
+
+    def close(self):
+        self._decode.shutdown(wait=True)
+        self._batcher.close()
+
+
+_lock = threading.Lock()
+_jobs = {}
+
+
+def get_jobs(loaded, k=config.TOP_K):
+    # One executor per model and k, shared by all sessions.
+    key = (loaded.tag, k)
+    with _lock:
+        if key not in _jobs:
+            _jobs[key] = InferenceJobs(
+                loaded, k, config.JOB_QUEUE_SIZE, config.DECODE_WORKERS, config.JOB_BATCH_SIZE
+            )
+        return _jobs[key]
@@ -0,0 +1,161 @@
+# metrics.py
+# Hot-path instrumentation: per-stage latency histograms, request/error
+# counters, Prometheus text export and sampled torch profiler traces.
+#
+#   with metrics.stage("inference"):
+#       output = model(batch)
+#
+# With CROP_METRICS=0, stage() returns a shared no-op context manager, so the
+# only remaining cost is one function call per stage.
+import contextlib
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import config
+
+ENABLED = config.METRICS
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+_NULL = contextlib.nullcontext()
+
+
+# ---------------------------
+# Primitives
+# ---------------------------
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        i = 0
+        while i < len(self.buckets) and value > self.buckets[i]:
+            i += 1
+        self.counts[i] += 1
+        self.total += value
+        self.count += 1
+
+
+class _Timer:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def observe(stage_name, seconds):
+    with _lock:
+        histogram = _histograms.get(stage_name)
+        if histogram is None:
+            histogram = _histograms[stage_name] = Histogram()
+        histogram.observe(seconds)
+
+
+def stage(name):
+    return _Timer(name) if ENABLED else _NULL
+
+
+def inc(name, value=1):
+    if ENABLED:
+        with _lock:
+            _counters[name] = _counters.get(name, 0) + value
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+# ---------------------------
+# Export
+# ---------------------------
+def render_prometheus():
+    lines = []
+    with _lock:
+        lines.append("# HELP crop_stage_seconds Time spent in each inference stage.")
+        lines.append("# TYPE crop_stage_seconds histogram")
+        for name, h in sorted(_histograms.items()):
+            cumulative = 0
+            for bound, count in zip(list(h.buckets) + ["+Inf"], h.counts):
+                cumulative += count
+                lines.append(f'crop_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'crop_stage_seconds_sum{{stage="{name}"}} {h.total:.6f}')
+            lines.append(f'crop_stage_seconds_count{{stage="{name}"}} {h.count}')
+        for name, value in sorted(_counters.items()):
+            lines.append(f"# TYPE crop_{name}_total counter")
+            lines.append(f"crop_{name}_total {value}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        data = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+
+
+def serve_in_background(port):
+    # For processes without their own HTTP server (the Streamlit app).
+    global _server
+    with _lock:
+        if _server is None and port:
+            _server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+
+
+# ---------------------------
+# Sampled profiling
+# ---------------------------
+class _Profile:
+    def __init__(self, name):
+        import torch
+
+        activities = [torch.profiler.ProfilerActivity.CPU]
+        if torch.cuda.is_available():
+            activities.append(torch.profiler.ProfilerActivity.CUDA)
+        self.name = name
+        self.profiler = torch.profiler.profile(activities=activities, record_shapes=True)
+
+    def __enter__(self):
+        self.profiler.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.__exit__(*exc)
+        os.makedirs(config.PROFILE_DIR, exist_ok=True)
+        path = os.path.join(config.PROFILE_DIR, f"{self.name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.json")
+        self.profiler.export_chrome_trace(path)
+        return False
+
+
+def maybe_profile(name="request"):
+    # Captures a chrome://tracing trace for roughly CROP_PROFILE_RATE of calls.
+    if not ENABLED or config.PROFILE_RATE <= 0 or random.random() >= config.PROFILE_RATE:
+        return _NULL
+    return _Profile(name)
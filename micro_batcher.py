@@ -0,0 +1,124 @@
+# micro_batcher.py
+# Server-side micro-batching: groups concurrent requests into one batched call
+# under a max batch size and a max wait time, and tracks latency/batch stats.
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+_STOP = object()
+
+
+def percentile(sorted_values, q):
+    # Nearest-rank percentile over an already sorted list.
+    if not sorted_values:
+        return 0.0
+    k = round(q / 100 * (len(sorted_values) - 1))
+    return sorted_values[min(len(sorted_values) - 1, k)]
+
+
+# ---------------------------
+# Stats
+# ---------------------------
+class LatencyStats:
+    def __init__(self, window=10000):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)  # seconds, most recent window
+        self._batch_sizes = deque(maxlen=window)
+        self.requests = 0
+        self.batches = 0
+
+    def record(self, batch_size, latencies):
+        with self._lock:
+            self.batches += 1
+            self.requests += batch_size
+            self._batch_sizes.append(batch_size)
+            self._latencies.extend(latencies)
+
+    def snapshot(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            sizes = list(self._batch_sizes)
+            requests, batches = self.requests, self.batches
+        return {
+            "requests": requests,
+            "batches": batches,
+            "latency_ms": {
+                f"p{q}": round(percentile(latencies, q) * 1000, 2) for q in (50, 95, 99)
+            },
+            "mean_batch_size": round(sum(sizes) / len(sizes), 2) if sizes else 0.0,
+            "max_batch_size": max(sizes, default=0),
+        }
+
+
+# ---------------------------
+# Batcher
+# ---------------------------
+class MicroBatcher:
+    # process_batch(items) -> list of results, one per item, in order.
+    # concurrency > 1 keeps several batches in flight, e.g. one per worker
+    # process of a WorkerPool.
+    def __init__(self, process_batch, max_batch_size=16, max_wait_ms=5.0, stats=None, concurrency=1):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.stats = stats or LatencyStats()
+        self._queue = queue.Queue()
+        self._threads = [
+            threading.Thread(target=self._loop, name=f"micro-batcher-{i}", daemon=True) for i in range(concurrency)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, item):
+        future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    def __call__(self, item, timeout=None):
+        return self.submit(item).result(timeout)
+
+    def close(self):
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+
+    def _collect(self):
+        # Block for the first request, then wait at most max_wait for more.
+        # Returns (batch, stop).
+        first = self._queue.get()
+        if first is _STOP:
+            return [], True
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is _STOP:
+                return batch, True
+            batch.append(entry)
+        return batch, False
+
+    def _loop(self):
+        stop = False
+        while not stop:
+            batch, stop = self._collect()
+            if batch:
+                self._run(batch)
+
+    def _run(self, batch):
+        try:
+            results = self.process_batch([item for item, _, _ in batch])
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        now = time.perf_counter()
+        for (_, future, _), result in zip(batch, results):
+            future.set_result(result)
+        self.stats.record(len(batch), [now - submitted for _, _, submitted in batch])
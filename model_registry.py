@@ -0,0 +1,267 @@
+# model_registry.py
+# Process-wide model registry: loads the crop classifier once and shares it
+# across every Streamlit session, thread and script in the process.
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+
+import joblib
+import torch
+from torchvision import models
+
+import backends
+import config
+import runtime
+import weights_io
+
+logger = logging.getLogger(__name__)
+
+
+def int8_path(path):
+    # Where quantization.py writes the INT8 model of an fp32 checkpoint.
+    return path if path.endswith(".pt") else os.path.splitext(path)[0] + ".int8.pt"
+
+
+def default_model_path():
+    # Prefer the mmap-able checkpoint; the joblib pickle is kept as a fallback.
+    # CROP_PRECISION=int8 applies to CROP_MODEL_PATH too: x.safetensors -> x.int8.pt
+    if config.PRECISION == "int8":
+        return int8_path(config.MODEL_PATH or "crop_classifier_model.pkl")
+    if config.MODEL_PATH:
+        return config.MODEL_PATH
+    if os.path.exists("crop_classifier_model.safetensors"):
+        return "crop_classifier_model.safetensors"
+    return "crop_classifier_model.pkl"
+
+
+MODEL_PATH = default_model_path()
+
+
+# ---------------------------
+# Registry entry
+# ---------------------------
+@dataclass
+class LoadedModel:
+    model: torch.nn.Module
+    class_to_idx: dict
+    idx_to_class: dict = field(init=False)
+    load_seconds: float = 0.0
+    param_bytes: int = 0  # size of weights + buffers held by the model
+    rss_bytes: int = 0  # process resident size right after loading
+    backend: str = "eager"
+    tag: str = ""  # identifies checkpoint + backend + temperature, e.g. for cache keys
+    temperature: float = 1.0  # softmax temperature fitted by calibration.py
+    device: torch.device = torch.device("cpu")  # where the model was placed at load
+    channels_last: bool = False
+    architecture: str = "resnet18"  # key of ARCHITECTURES, from checkpoint metadata
+
+    def __post_init__(self):
+        # Reverse mapping index → class name
+        self.idx_to_class = {v: k for k, v in self.class_to_idx.items()}
+
+    def to_device(self, batch):
+        # Inputs follow the model's placement and layout, chosen once at load.
+        if self.device.type == "cuda":
+            if not batch.is_pinned():
+                batch = batch.pin_memory()
+            batch = batch.to(self.device, non_blocking=True)
+        if self.channels_last:
+            batch = batch.contiguous(memory_format=torch.channels_last)
+        return batch
+
+    def stats(self):
+        return {
+            "architecture": self.architecture,
+            "backend": self.backend,
+            "device": str(self.device),
+            "threads": torch.get_num_threads(),
+            "num_classes": len(self.class_to_idx),
+            "load_seconds": round(self.load_seconds, 3),
+            "param_mb": round(self.param_bytes / 2**20, 1),
+            "rss_mb": round(self.rss_bytes / 2**20, 1),
+        }
+
+
+_lock = threading.Lock()
+_registry = {}
+
+
+# ---------------------------
+# Architectures
+# ---------------------------
+@dataclass(frozen=True)
+class Architecture:
+    build: object  # torchvision constructor, called with weights=
+    head: str  # module path of the final Linear layer
+
+
+ARCHITECTURES = {
+    "resnet18": Architecture(models.resnet18, "fc"),
+    "mobilenet_v3_small": Architecture(models.mobilenet_v3_small, "classifier.3"),
+    "mobilenet_v3_large": Architecture(models.mobilenet_v3_large, "classifier.3"),
+    "efficientnet_b0": Architecture(models.efficientnet_b0, "classifier.1"),
+}
+DEFAULT_ARCHITECTURE = "resnet18"
+
+
+def replace_head(model, head, num_classes):
+    # Swap the final Linear layer (e.g. "fc" or "classifier.3") for num_classes outputs.
+    parent_name, _, name = head.rpartition(".")
+    in_features = model.get_submodule(head).in_features
+    setattr(model.get_submodule(parent_name), name, torch.nn.Linear(in_features, num_classes))
+    return model
+
+
+def build_model(num_classes, architecture=DEFAULT_ARCHITECTURE, weights=None):
+    # weights="DEFAULT" starts the backbone from torchvision's ImageNet weights.
+    if architecture not in ARCHITECTURES:
+        raise ValueError(f"unknown architecture {architecture!r}, expected one of {list(ARCHITECTURES)}")
+    spec = ARCHITECTURES[architecture]
+    return replace_head(spec.build(weights=weights), spec.head, num_classes)
+
+
+# ---------------------------
+# Helpers
+# ---------------------------
+def current_rss_bytes():
+    # /proc is available on Linux (Render); fall back to peak RSS elsewhere.
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def model_nbytes(model):
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+def select_device():
+    return torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+
+def calibration_path(path):
+    return os.path.splitext(path)[0] + ".calibration.json"
+
+
+def read_temperature(path):
+    try:
+        with open(calibration_path(path)) as f:
+            return float(json.load(f)["temperature"])
+    except FileNotFoundError:
+        return 1.0
+
+
+def read_checkpoint_metadata(path):
+    # Returns (state_dict, metadata) for either checkpoint format; metadata
+    # always has "class_to_idx" and "architecture".
+    if path.endswith(".safetensors"):
+        state_dict, metadata = weights_io.load_checkpoint(path)
+    else:
+        model_data = joblib.load(path)  # weights + class_to_idx (+ optional metadata)
+        state_dict = model_data["model_state_dict"]
+        metadata = {key: value for key, value in model_data.items() if key != "model_state_dict"}
+    metadata.setdefault("architecture", DEFAULT_ARCHITECTURE)
+    return state_dict, metadata
+
+
+def read_checkpoint(path):
+    # Returns (state_dict, class_to_idx) for either checkpoint format.
+    state_dict, metadata = read_checkpoint_metadata(path)
+    return state_dict, metadata["class_to_idx"]
+
+
+def _load_torchscript(path):
+    # Exported/quantized TorchScript archive with a JSON sidecar.
+    metadata = weights_io.read_sidecar(path)
+    if metadata.get("quantized_engine"):
+        torch.backends.quantized.engine = metadata["quantized_engine"]
+    model = torch.jit.load(path, map_location="cpu")
+    model.eval()
+    # Frozen/quantized archives keep their weights as CPU constants.
+    return model, metadata, os.path.getsize(path)
+
+
+def _load_onnx(path):
+    metadata = weights_io.read_sidecar(path)
+    return backends.OnnxRuntimeModel(path), metadata, os.path.getsize(path)
+
+
+def _load_eager(path):
+    state_dict, metadata = read_checkpoint_metadata(path)
+
+    # Build on the meta device and adopt the loaded tensors as-is: no random
+    # init, and mmap-backed weights are not copied.
+    with torch.device("meta"):
+        model = build_model(len(metadata["class_to_idx"]), metadata["architecture"])
+    model.load_state_dict(state_dict, assign=True)
+    model.eval()
+    return model, metadata, model_nbytes(model)
+
+
+def _load(path, backend):
+    if backend not in backends.BACKENDS:
+        raise ValueError(f"unknown backend {backend!r}, expected one of {backends.BACKENDS}")
+    runtime.configure_threads()
+    start = time.perf_counter()
+    device, channels_last = torch.device("cpu"), False
+    if path.endswith(".onnx") or backend == "onnx":
+        backend = "onnx"
+        model, metadata, nbytes = _load_onnx(
+            path if path.endswith(".onnx") else backends.onnx_path_for(path)
+        )
+    elif path.endswith(".pt"):
+        backend = "torchscript"
+        model, metadata, nbytes = _load_torchscript(path)
+    else:
+        model, metadata, nbytes = _load_eager(path)
+        # Placement and memory format are decided once here, not per request.
+        # Checkpoints are stored NCHW, so channels-last copies the conv weights
+        # out of the mmap into private memory (see benchmarks/load_weights.py).
+        device, channels_last = select_device(), config.CHANNELS_LAST
+        if channels_last:
+            model = model.to(memory_format=torch.channels_last)
+        model.to(device)
+        if backend == "torchscript":
+            model = backends.to_torchscript(model, device)
+
+    temperature = read_temperature(path)
+    entry = LoadedModel(
+        model=model,
+        class_to_idx=metadata["class_to_idx"],
+        load_seconds=time.perf_counter() - start,
+        param_bytes=nbytes,
+        rss_bytes=current_rss_bytes(),
+        backend=backend,
+        # The temperature changes confidences, so re-calibrating invalidates cached predictions
+        tag=f"{path}|{backend}|{os.path.getmtime(path) if os.path.exists(path) else 0}|t{temperature}",
+        temperature=temperature,
+        device=device,
+        channels_last=channels_last,
+        architecture=metadata.get("architecture", DEFAULT_ARCHITECTURE),
+    )
+    logger.info("Loaded %s: %s", path, entry.stats())
+    return entry
+
+
+# ---------------------------
+# Public API
+# ---------------------------
+def get_model(path=MODEL_PATH, backend=config.BACKEND):
+    # Fast path without the lock once the model is loaded.
+    key = (path, backend)
+    entry = _registry.get(key)
+    if entry is not None:
+        return entry
+    with _lock:
+        entry = _registry.get(key)
+        if entry is None:
+            entry = _load(path, backend)
+            _registry[key] = entry
+    return entry
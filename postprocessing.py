@@ -0,0 +1,27 @@
+# postprocessing.py
+# Logits -> top-k classes with (optionally temperature-scaled) softmax
+# probabilities, vectorized over the whole batch.
+import torch
+
+
+def probabilities(logits, temperature=1.0):
+    return torch.softmax(logits.float() / temperature, dim=1)
+
+
+def top_k(logits, k=3, temperature=1.0):
+    # Returns (probabilities, indices), both (N, k), best first.
+    probs = probabilities(logits, temperature)
+    return probs.topk(min(k, probs.shape[1]), dim=1)
+
+
+def top_k_lists(logits, k=3, temperature=1.0):
+    # One [[class_index, probability], ...] list per image, JSON-friendly.
+    probs, indices = top_k(logits, k, temperature)
+    return [
+        [[idx, round(p, 6)] for idx, p in zip(idx_row, p_row)]
+        for idx_row, p_row in zip(indices.tolist(), probs.tolist())
+    ]
+
+
+def describe(top, idx_to_class):
+    return [{"class_index": idx, "class_name": idx_to_class[idx], "probability": p} for idx, p in top]
@@ -0,0 +1,103 @@
+# prediction_cache.py
+# Process-wide prediction cache keyed on a hash of the uploaded bytes. The
+# in-memory LRU is bounded by entry count and (approximate) bytes; an optional
+# SQLite tier keeps predictions across restarts.
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import config
+
+
+class PredictionCache:
+    # Values must be JSON-serializable so they can live in the disk tier.
+    # max_entries=0 disables the cache (both tiers): every get() is a miss.
+    def __init__(self, max_entries=10000, max_bytes=64 * 2**20, disk_path=None):
+        self.enabled = max_entries > 0
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._bytes = 0
+        self.hits = self.misses = self.disk_hits = self.evictions = 0
+
+        self._db = None
+        if disk_path and self.enabled:
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS predictions (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._db.commit()
+
+    @staticmethod
+    def key(data, model_tag=""):
+        # The model tag keeps predictions from a different checkpoint/backend apart.
+        digest = hashlib.blake2b(data, digest_size=16, person=b"crop-classifier")
+        digest.update(model_tag.encode())
+        return digest.hexdigest()
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if self._db is not None:
+                row = self._db.execute("SELECT value FROM predictions WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self.hits += 1
+                    self.disk_hits += 1
+                    value = json.loads(row[0])
+                    self._insert(key, value, len(key) + len(row[0]))
+                    return value
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        if not self.enabled:
+            return
+        encoded = json.dumps(value)
+        with self._lock:
+            self._insert(key, value, len(key) + len(encoded))
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO predictions VALUES (?, ?)", (key, encoded))
+                self._db.commit()
+
+    def _insert(self, key, value, size):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old[1]
+        self._entries[key] = (value, size)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PredictionCache(config.CACHE_ENTRIES, config.CACHE_MB * 2**20, config.CACHE_DB or None)
+        return _cache
@@ -0,0 +1,115 @@
+# preprocessing.py
+# Image preprocessing shared by the Streamlit UI and the offline tools.
+import numpy as np
+import torch
+import torchvision.transforms as transforms
+from PIL import Image
+
+import config
+import metrics
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+MEAN = [0.485, 0.456, 0.406]
+STD = [0.229, 0.224, 0.225]
+
+# ---------------------------
+# Preprocessing pipeline
+# ---------------------------
+transform = transforms.Compose(
+    [
+        transforms.Resize((224, 224)),
+        transforms.ToTensor(),
+        transforms.Normalize(MEAN, STD),
+    ]
+)
+
+
+def load_image(fp):
+    return Image.open(fp).convert("RGB")
+
+
+# ---------------------------
+# Fast path for large photos
+# ---------------------------
+# ToTensor + Normalize folded into one multiply-subtract on uint8 input:
+# (x / 255 - mean) / std == x * scale - shift
+_SCALE = (1.0 / (255.0 * torch.tensor(STD))).view(3, 1, 1)
+_SHIFT = (torch.tensor(MEAN) / torch.tensor(STD)).view(3, 1, 1)
+
+
+def to_normalized_tensor(image):
+    x = torch.from_numpy(np.array(image, dtype=np.uint8))  # HWC uint8
+    return x.permute(2, 0, 1).float().mul_(_SCALE).sub_(_SHIFT)
+
+
+def fast_decode(fp, size=224):
+    # JPEGs are decoded directly at 1/2, 1/4 or 1/8 scale (draft mode) as long
+    # as both sides stay >= size; other formats decode at full size.
+    image = Image.open(fp)
+    image.draft("RGB", (size, size))
+    return image.convert("RGB")
+
+
+def resize_uint8(image, size=224):
+    # (3, size, size) uint8, for storing preprocessed images compactly;
+    # normalize_uint8 turns a batch of them into model input.
+    resized = image.resize((size, size), Image.BILINEAR, reducing_gap=3.0)
+    return torch.from_numpy(np.array(resized, dtype=np.uint8)).permute(2, 0, 1).contiguous()
+
+
+def normalize_uint8(batch):
+    return batch.float().mul_(_SCALE).sub_(_SHIFT)
+
+
+def fast_resize(image, size=224):
+    # reducing_gap shrinks by an integer factor before the final resample.
+    return to_normalized_tensor(image.resize((size, size), Image.BILINEAR, reducing_gap=3.0))
+
+
+def fast_preprocess(fp, size=224):
+    # Close to transform(load_image(fp)) but much cheaper on 12-48 MP photos.
+    return fast_resize(fast_decode(fp, size), size)
+
+
+# ---------------------------
+# Resolution modes
+# ---------------------------
+# 0 is the original squashing resize to 224x224; the others keep the aspect
+# ratio: shorter side to size / CROP_FRACTION, then a size x size center crop.
+RESOLUTIONS = (0, 160, 192, 224, 288)
+CROP_FRACTION = 0.875
+
+
+def check_resolution(resolution):
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"resolution must be one of {', '.join(map(str, RESOLUTIONS))}, got {resolution}")
+    return resolution
+
+
+def center_crop_box(width, height):
+    # Source box of the center crop: resizing it to size x size equals resize-then-crop.
+    side = min(width, height) * CROP_FRACTION
+    left, top = (width - side) / 2, (height - side) / 2
+    return left, top, left + side, top + side
+
+
+def center_crop_resize(image, size=224):
+    # Crop and resize in one resample, straight from the (draft-decoded) image.
+    box = center_crop_box(*image.size)
+    return to_normalized_tensor(image.resize((size, size), Image.BILINEAR, box=box, reducing_gap=3.0))
+
+
+def preprocess(fp, resolution=None):
+    # File path or file-like object -> normalized 3 x size x size float tensor
+    # (size 224 for resolution 0). None uses CROP_RESOLUTION.
+    resolution = config.RESOLUTION if resolution is None else resolution
+    if not resolution:
+        with metrics.stage("decode"):
+            image = fast_decode(fp) if config.FAST_DECODE else load_image(fp)
+        with metrics.stage("preprocess"):
+            return fast_resize(image) if config.FAST_DECODE else transform(image)
+    with metrics.stage("decode"):
+        # Draft decode keeps the shorter side >= the pre-crop size.
+        image = fast_decode(fp, round(resolution / CROP_FRACTION)) if config.FAST_DECODE else load_image(fp)
+    with metrics.stage("preprocess"):
+        return center_crop_resize(image, resolution)
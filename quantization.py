@@ -0,0 +1,113 @@
+# quantization.py
+# Post-training static INT8 quantization of the classifier (ResNet-18 or
+# MobileNetV3-Large, which have quantizable torchvision variants) for CPU
+# serving: calibrate on a sample folder, check accuracy against fp32 on a
+# held-out labeled folder, and compare latency.
+#
+#   python quantization.py --calibration sample_images/ --eval heldout/
+#   CROP_PRECISION=int8 streamlit run app.py
+import argparse
+import os
+import platform
+
+import torch
+from torchvision.models import quantization as quantized_models
+
+import weights_io
+from evaluation import accuracy, collect_logits, time_forward
+from image_data import image_loader, list_images, list_labeled_images
+from model_registry import ARCHITECTURES, MODEL_PATH, get_model, int8_path, read_checkpoint_metadata, replace_head
+
+QUANTIZABLE = {
+    "resnet18": quantized_models.resnet18,
+    "mobilenet_v3_large": quantized_models.mobilenet_v3_large,
+}
+
+
+def default_engine():
+    return "qnnpack" if platform.machine().lower() in ("arm64", "aarch64") else "fbgemm"
+
+
+def build_quantizable_model(state_dict, num_classes, architecture="resnet18"):
+    # Same module names as the float torchvision model, plus quant/dequant
+    # stubs, so the existing model_state_dict loads unchanged.
+    if architecture not in QUANTIZABLE:
+        raise ValueError(f"no quantizable variant of {architecture!r}, expected one of {list(QUANTIZABLE)}")
+    model = QUANTIZABLE[architecture](weights=None, quantize=False)
+    replace_head(model, ARCHITECTURES[architecture].head, num_classes)
+    model.load_state_dict(state_dict)
+    model.eval()
+    model.fuse_model()
+    return model
+
+
+def quantize(state_dict, num_classes, calibration_batches, engine=None, architecture="resnet18"):
+    engine = engine or default_engine()
+    torch.backends.quantized.engine = engine
+    model = build_quantizable_model(state_dict, num_classes, architecture)
+    model.qconfig = torch.ao.quantization.get_default_qconfig(engine)
+    torch.ao.quantization.prepare(model, inplace=True)
+    with torch.no_grad():  # observers record activation ranges
+        for batch in calibration_batches:
+            model(batch)
+    torch.ao.quantization.convert(model, inplace=True)
+    return model
+
+
+def save_quantized(model, path, class_to_idx, engine, architecture="resnet18"):
+    traced = torch.jit.trace(model, torch.randn(1, 3, 224, 224))
+    torch.jit.save(traced, path)
+    weights_io.save_sidecar(
+        path,
+        class_to_idx,
+        format="torchscript",
+        quantized="int8",
+        quantized_engine=engine,
+        architecture=architecture,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Produce an INT8 quantized model for CPU inference.")
+    parser.add_argument("--model", default=MODEL_PATH, help="fp32 checkpoint (.pkl or .safetensors)")
+    parser.add_argument("--calibration", required=True, help="folder of representative images")
+    parser.add_argument("--calibration-images", type=int, default=512)
+    parser.add_argument("--eval", help="held-out labeled folder (root/<class name>/*.jpg)")
+    parser.add_argument("-o", "--output", help="default: <model>.int8.pt, where CROP_PRECISION=int8 looks for it")
+    parser.add_argument("--engine", choices=["fbgemm", "x86", "qnnpack"], default=default_engine())
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    args = parser.parse_args(argv)
+    args.output = args.output or int8_path(args.model)
+
+    state_dict, metadata = read_checkpoint_metadata(args.model)
+    class_to_idx, architecture = metadata["class_to_idx"], metadata["architecture"]
+    calibration_paths = list_images(args.calibration)[: args.calibration_images]
+    if not calibration_paths:
+        parser.error(f"no images found in {args.calibration}")
+    loader = image_loader(calibration_paths, args.batch_size, args.workers)
+    batches = (batch for _, batch, _ in loader if batch is not None)
+
+    qmodel = quantize(state_dict, len(class_to_idx), batches, args.engine, architecture)
+    save_quantized(qmodel, args.output, class_to_idx, args.engine, architecture)
+    print(f"Calibrated on {len(calibration_paths)} images, wrote {args.output}")
+
+    fp32 = get_model(args.model).model
+    qmodel = torch.jit.load(args.output)
+    if args.eval:
+        paths, labels = list_labeled_images(args.eval, class_to_idx)
+        fp32_logits, targets = collect_logits(fp32, paths, labels, args.batch_size, args.workers)
+        int8_logits, _ = collect_logits(qmodel, paths, labels, args.batch_size, args.workers)
+        agreement = (fp32_logits.argmax(1) == int8_logits.argmax(1)).float().mean().item()
+        print(
+            f"Accuracy on {len(targets)} images: fp32 {accuracy(fp32_logits, targets):.4f}, "
+            f"int8 {accuracy(int8_logits, targets):.4f}, top-1 agreement {agreement:.4f}"
+        )
+
+    for batch_size in (1, args.batch_size):
+        fp32_ms, int8_ms = time_forward(fp32, batch_size), time_forward(qmodel, batch_size)
+        print(f"batch {batch_size:>3}: fp32 {fp32_ms:.1f} ms, int8 {int8_ms:.1f} ms ({fp32_ms / int8_ms:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
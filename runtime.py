@@ -0,0 +1,55 @@
+# runtime.py
+# Process-level torch settings: thread pools sized to the container's CPU
+# quota rather than the host's core count.
+import math
+import os
+import threading
+
+import torch
+
+import config
+
+_configured = False
+_lock = threading.Lock()
+
+
+def cpu_quota():
+    # CPUs this process may actually use: cgroup v2/v1 quota, then affinity.
+    limits = []
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+            if quota != "max":
+                limits.append(int(quota) / int(period))
+    except (OSError, ValueError):
+        try:
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+                quota = int(f.read())
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+                period = int(f.read())
+            if quota > 0:
+                limits.append(quota / period)
+        except (OSError, ValueError):
+            pass
+    try:
+        limits.append(len(os.sched_getaffinity(0)))
+    except AttributeError:
+        limits.append(os.cpu_count() or 1)
+    return max(1, math.floor(min(limits)))
+
+
+def configure_threads(threads=None, interop_threads=None):
+    # Idempotent; must run before the first forward pass, since PyTorch only
+    # accepts the inter-op setting before any parallel work has started.
+    global _configured
+    with _lock:
+        if _configured:
+            return torch.get_num_threads()
+        threads = threads or config.THREADS or cpu_quota()
+        torch.set_num_threads(threads)
+        try:
+            torch.set_num_interop_threads(interop_threads or config.INTEROP_THREADS)
+        except RuntimeError:
+            pass  # already fixed by earlier torch work in this process
+        _configured = True
+        return threads
@@ -0,0 +1,237 @@
+# serve.py
+# Stateless HTTP inference service backed by the shared model registry.
+# Concurrent requests are grouped into single forward passes by a micro-batcher.
+#
+#   python serve.py --port 8080 --max-batch-size 16 --max-wait-ms 5
+#   curl -F image=@leaf.jpg localhost:8080/predict
+#   curl --data-binary @leaf.jpg -H "Content-Type: image/jpeg" localhost:8080/predict
+#   curl localhost:8080/metrics
+#   curl localhost:8080/metrics/prometheus
+#   curl localhost:8080/readyz
+#   curl -F image=@leaf.jpg "localhost:8080/predict?resolution=160"
+#
+# The socket is bound before torch is imported: /healthz answers at once and
+# /readyz (and /predict) return 503 until the model has loaded (warmup.py).
+import argparse
+import base64
+import binascii
+import io
+import json
+import os
+from email.parser import BytesParser
+from email.policy import default as email_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import config
+import metrics
+import warmup
+from micro_batcher import MicroBatcher
+from prediction_cache import PredictionCache, get_cache
+
+MAX_BODY_BYTES = 32 * 2**20
+
+
+# ---------------------------
+# Request parsing
+# ---------------------------
+def parse_images(content_type, body):
+    # Accepts raw image bytes, multipart/form-data, or JSON with base64
+    # "image" / "images" fields. Returns a list of encoded images.
+    content_type = content_type or ""
+    if content_type.startswith("multipart/form-data"):
+        message = BytesParser(policy=email_policy).parsebytes(
+            b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + body
+        )
+        images = [part.get_payload(decode=True) for part in message.iter_parts() if part.get_filename()]
+    elif content_type.startswith("application/json"):
+        try:
+            payload = json.loads(body)
+            encoded = payload["images"] if "images" in payload else [payload["image"]]
+            images = [base64.b64decode(data, validate=True) for data in encoded]
+        except (ValueError, KeyError, TypeError, binascii.Error) as e:
+            raise ValueError(f"invalid JSON payload: {e}") from e
+    else:
+        images = [body]
+    images = [image for image in images if image]
+    if not images:
+        raise ValueError("no image in request")
+    return images
+
+
+# ---------------------------
+# HTTP handler
+# ---------------------------
+class PredictHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    batcher = None
+    idx_to_class = None
+    cache = None
+    model_tag = ""
+    resolution = config.RESOLUTION
+
+    def do_GET(self):
+        if self.path == "/healthz":
+            self._send_json(200, {"status": "ok"})
+        elif self.path == "/readyz":
+            self._send_json(200 if warmup.ready() else 503, warmup.status())
+        elif self.path == "/metrics":
+            stats = self.batcher.stats.snapshot() if self.batcher else {}
+            self._send_json(200, {**stats, "model": warmup.status(), "cache": self.cache.stats()})
+        elif self.path == "/metrics/prometheus":
+            data = metrics.render_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path != "/predict":
+            self._reject(404, {"error": "not found"})
+            return
+        if self.batcher is None:
+            self._reject(503, warmup.status(), {"Retry-After": "1"})
+            return
+        from postprocessing import describe
+        from preprocessing import check_resolution, preprocess
+
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            self._reject(413, {"error": "request too large"})
+            return
+        body = self.rfile.read(length)
+        metrics.inc("requests")
+
+        try:
+            # ?resolution= overrides the server default; the batcher buckets by shape
+            query = parse_qs(url.query)
+            resolution = check_resolution(int(query["resolution"][0])) if "resolution" in query else self.resolution
+            images = parse_images(self.headers.get("Content-Type"), body)
+            keys = [self.cache.key(data, f"{self.model_tag}|res{resolution}") for data in images]
+            results = [self.cache.get(key) for key in keys]
+            # Only cache misses are decoded and sent to the batcher
+            futures = {
+                i: self.batcher.submit(preprocess(io.BytesIO(data), resolution))
+                for i, (data, top) in enumerate(zip(images, results))
+                if top is None
+            }
+        except (ValueError, OSError) as e:  # PIL raises OSError subclasses on bad images
+            metrics.inc("request_errors")
+            self._send_json(400, {"error": str(e)})
+            return
+
+        try:
+            for i, future in futures.items():
+                results[i] = future.result()
+                self.cache.put(keys[i], results[i])
+        except Exception as e:
+            metrics.inc("request_errors")
+            self._send_json(500, {"error": f"inference failed: {e}"})
+            return
+        predictions = []
+        for top in results:
+            top = describe(top, self.idx_to_class)
+            predictions.append({**top[0], "top_k": top})
+        self._send_json(200, {"predictions": predictions})
+
+    def _send_json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _reject(self, status, payload, headers=None):
+        # Replies without reading the request body; closing the keep-alive
+        # connection keeps the unread bytes from being parsed as the next request.
+        self.close_connection = True
+        self._send_json(status, payload, {**(headers or {}), "Connection": "close"})
+
+    def log_message(self, format, *args):
+        pass  # keep the hot path quiet; use /metrics instead
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP crop classification service with dynamic batching.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8080)))
+    parser.add_argument("--model", default=config.MODEL_PATH, help="checkpoint path (default: auto-detected)")
+    parser.add_argument("--max-batch-size", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="how long to wait to fill a batch")
+    parser.add_argument("--top-k", type=int, default=config.TOP_K)
+    parser.add_argument(
+        "--no-cache", action="store_true", help="send every request to the model (same as CROP_CACHE_ENTRIES=0)"
+    )
+    # Literal copy of preprocessing.RESOLUTIONS: importing it would pull in torch here
+    parser.add_argument(
+        "--resolution",
+        type=int,
+        default=config.RESOLUTION,
+        choices=(0, 160, 192, 224, 288),
+        help="default input resolution (0 = original 224x224 resize); requests may pass ?resolution=",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=0, help="forked inference processes pinned to disjoint cores (0 = in-process)"
+    )
+    args = parser.parse_args(argv)
+
+    pool = None
+
+    def setup(loaded):
+        # Runs once the model is loaded; /predict is served from then on.
+        nonlocal pool
+        from batch_inference import make_predict_batch
+
+        predict_batch = make_predict_batch(loaded, args.top_k)
+        if args.workers:
+            from worker_pool import WorkerPool
+
+            # Fork after loading so workers share the weights; one batch in flight per worker.
+            pool = WorkerPool(predict_batch, args.workers)
+            predict_batch = pool
+        PredictHandler.idx_to_class = loaded.idx_to_class
+        from cascade import model_tag
+
+        PredictHandler.model_tag = f"{model_tag(loaded)}|top{args.top_k}"
+        PredictHandler.batcher = MicroBatcher(
+            predict_batch,
+            args.max_batch_size,
+            args.max_wait_ms,
+            concurrency=len(pool.processes) if pool else 1,
+        )
+        print(f"Model ready (model {loaded.stats()})")
+
+    PredictHandler.cache = PredictionCache(max_entries=0) if args.no_cache else get_cache()
+    PredictHandler.resolution = args.resolution
+    # Forking workers from a process that already runs server threads is
+    # unsafe, so with --workers the model loads before the socket is bound.
+    warmup.start(
+        args.model or None, setup=setup, preload=("preprocessing", "batch_inference"), background=not args.workers
+    )
+    if args.workers:
+        warmup.wait()
+
+    server = ThreadingHTTPServer((args.host, args.port), PredictHandler)
+    server.daemon_threads = True
+    print(f"Serving on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if PredictHandler.batcher:
+            PredictHandler.batcher.close()
+        if pool:
+            pool.close()
+
+
+if __name__ == "__main__":
+    main()
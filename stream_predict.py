@@ -0,0 +1,207 @@
+# stream_predict.py
+# Streaming classification of drone videos and image sequences. Frames are
+# read lazily, sampled at a fixed rate, near-duplicates are dropped with a
+# difference hash, the rest are classified in batches, and predictions are
+# averaged per time segment. Memory stays bounded by one batch plus one
+# per-segment accumulator, however long the video is.
+#
+#   python stream_predict.py flight.mp4 --sample-fps 2 --segment-seconds 10 -o segments.jsonl
+#   python stream_predict.py frames_dir/ --sequence-fps 30
+import argparse
+import json
+import os
+import sys
+import time
+
+import torch
+
+import config
+from image_data import list_images
+from model_registry import MODEL_PATH, get_model
+from postprocessing import probabilities
+from preprocessing import fast_resize, load_image
+
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".avi", ".mkv", ".webm")
+
+
+# ---------------------------
+# Frame sources (generators)
+# ---------------------------
+def video_frames(path):
+    # Yields (seconds, PIL image). Needs PyAV: pip install av
+    try:
+        import av
+    except ImportError as e:
+        raise ImportError("video input needs PyAV: pip install av") from e
+    with av.open(path) as container:
+        stream = container.streams.video[0]
+        stream.thread_type = "AUTO"
+        for frame in container.decode(stream):
+            if frame.time is not None:
+                yield frame.time, frame.to_image()
+
+
+def sequence_frames(source, fps):
+    # Image folder or file list, in order, at a nominal frame rate.
+    for i, path in enumerate(list_images(source)):
+        yield i / fps, load_image(path)
+
+
+def sample(frames, sample_fps):
+    next_time = 0.0
+    for t, image in frames:
+        if t + 1e-6 >= next_time:
+            next_time = t + 1.0 / sample_fps
+            yield t, image
+
+
+# ---------------------------
+# Near-duplicate filtering
+# ---------------------------
+def dhash(image, size=8):
+    # 64-bit difference hash: brightness gradient signs on a 9x8 thumbnail.
+    pixels = list(image.convert("L").resize((size + 1, size)).getdata())
+    bits = 0
+    for row in range(size):
+        for col in range(size):
+            left = pixels[row * (size + 1) + col]
+            bits = (bits << 1) | (left > pixels[row * (size + 1) + col + 1])
+    return bits
+
+
+def skip_near_duplicates(frames, threshold, stats):
+    # Drops frames within `threshold` bits of the last kept frame.
+    last = None
+    for t, image in frames:
+        h = dhash(image)
+        if last is not None and (h ^ last).bit_count() <= threshold:
+            stats["skipped"] += 1
+            continue
+        last = h
+        yield t, image
+
+
+def batched(frames, batch_size):
+    batch = []
+    for frame in frames:
+        batch.append(frame)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ---------------------------
+# Segment aggregation
+# ---------------------------
+class SegmentAggregator:
+    # Running mean of class probabilities per fixed-length time segment.
+    def __init__(self, segment_seconds, idx_to_class, k):
+        self.segment_seconds = segment_seconds
+        self.idx_to_class = idx_to_class
+        self.k = k
+        self.index = None
+        self.total = None
+        self.frames = 0
+
+    def add(self, t, probs):
+        # Returns a finished segment record when t starts a new segment.
+        index = int(t // self.segment_seconds)
+        finished = self.flush() if self.index is not None and index != self.index else None
+        if self.index is None or index != self.index:
+            self.index, self.total, self.frames = index, torch.zeros_like(probs), 0
+        self.total += probs
+        self.frames += 1
+        return finished
+
+    def flush(self):
+        if not self.frames:
+            return None
+        mean = self.total / self.frames
+        values, indices = mean.topk(min(self.k, len(mean)))
+        top = [
+            {"class_index": i, "class_name": self.idx_to_class[i], "probability": round(p, 4)}
+            for i, p in zip(indices.tolist(), values.tolist())
+        ]
+        record = {
+            "start": self.index * self.segment_seconds,
+            "end": (self.index + 1) * self.segment_seconds,
+            "frames_classified": self.frames,
+            "class_name": top[0]["class_name"],
+            "confidence": top[0]["probability"],
+            "top_k": top,
+        }
+        self.frames = 0
+        return record
+
+
+def classify_stream(frames, loaded, batch_size=16, segment_seconds=10.0, k=config.TOP_K):
+    # Yields segment records as soon as each segment is complete.
+    aggregator = SegmentAggregator(segment_seconds, loaded.idx_to_class, k)
+    with torch.inference_mode():
+        for batch in batched(frames, batch_size):
+            tensor = loaded.to_device(torch.stack([fast_resize(image) for _, image in batch]))
+            probs = probabilities(loaded.model(tensor), loaded.temperature).cpu()
+            for (t, _), p in zip(batch, probs):
+                record = aggregator.add(t, p)
+                if record:
+                    yield record
+    record = aggregator.flush()
+    if record:
+        yield record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Classify a video or image sequence per time segment.")
+    parser.add_argument("source", help="video file, image folder, or text file listing frame paths")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output path (default: stdout)")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--sample-fps", type=float, default=2.0, help="frames per second to consider")
+    parser.add_argument("--sequence-fps", type=float, default=30.0, help="frame rate of image sequences")
+    parser.add_argument("--segment-seconds", type=float, default=10.0)
+    parser.add_argument("--dedup-threshold", type=int, default=6, help="max differing hash bits to skip (-1 = off)")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--top-k", type=int, default=config.TOP_K)
+    args = parser.parse_args(argv)
+
+    if args.source.lower().endswith(VIDEO_EXTENSIONS):
+        frames = video_frames(args.source)
+    elif os.path.exists(args.source):
+        frames = sequence_frames(args.source, args.sequence_fps)
+    else:
+        parser.error(f"{args.source} not found")
+
+    stats = {"sampled": 0, "skipped": 0}
+
+    def counted(frames):
+        for frame in frames:
+            stats["sampled"] += 1
+            yield frame
+
+    frames = counted(sample(frames, args.sample_fps))
+    if args.dedup_threshold >= 0:
+        frames = skip_near_duplicates(frames, args.dedup_threshold, stats)
+
+    loaded = get_model(args.model)
+    out = sys.stdout if args.output == "-" else open(args.output, "w")
+    start = time.perf_counter()
+    try:
+        segments = 0
+        for record in classify_stream(frames, loaded, args.batch_size, args.segment_seconds, args.top_k):
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            segments += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - start
+    print(
+        f"{segments} segments, {stats['sampled']} frames sampled, {stats['skipped']} near-duplicates skipped "
+        f"in {elapsed:.1f}s ({stats['sampled'] / elapsed if elapsed else 0:.1f} frames/sec)",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+# tiled_predict.py
+# Tiled inference for large orthomosaics / field images: the raster is split
+# into overlapping windows that are read lazily, classified in batches, and
+# returned as a per-tile label grid plus an aggregated summary.
+#
+#   python tiled_predict.py field.tif -o field.json --heatmap field_labels.png
+#   python tiled_predict.py field.jpg --tile-size 448 --overlap 0.5
+#
+# GeoTIFFs are read window by window with rasterio when it is installed
+# (pip install rasterio), so the full raster never sits in memory. Other
+# formats are decoded once with Pillow.
+import argparse
+import colorsys
+import json
+import sys
+import time
+
+import numpy as np
+import torch
+from PIL import Image
+
+import config
+from model_registry import MODEL_PATH, get_model
+from postprocessing import probabilities
+from preprocessing import fast_resize
+
+
+# ---------------------------
+# Raster readers
+# ---------------------------
+class PillowRaster:
+    def __init__(self, path):
+        Image.MAX_IMAGE_PIXELS = None  # orthomosaics legitimately exceed Pillow's bomb limit
+        self.image = Image.open(path)
+        self.width, self.height = self.image.size
+
+    def read(self, x, y, w, h):
+        if self.image.mode != "RGB":
+            self.image = self.image.convert("RGB")
+        return self.image.crop((x, y, x + w, y + h))
+
+    def close(self):
+        self.image.close()
+
+
+class RasterioRaster:
+    def __init__(self, path):
+        import rasterio
+
+        self.dataset = rasterio.open(path)
+        self.width, self.height = self.dataset.width, self.dataset.height
+        self.bands = [1, 2, 3] if self.dataset.count >= 3 else [1, 1, 1]
+
+    def read(self, x, y, w, h):
+        from rasterio.windows import Window
+
+        data = self.dataset.read(self.bands, window=Window(x, y, w, h))  # (3, h, w)
+        if data.dtype != np.uint8:
+            data = np.clip(data / max(1, data.max()) * 255, 0, 255).astype(np.uint8)
+        return Image.fromarray(np.ascontiguousarray(data.transpose(1, 2, 0)))
+
+    def close(self):
+        self.dataset.close()
+
+
+def open_raster(path):
+    if path.lower().endswith((".tif", ".tiff")):
+        try:
+            return RasterioRaster(path)
+        except ImportError:
+            pass
+    return PillowRaster(path)
+
+
+# ---------------------------
+# Tiling
+# ---------------------------
+def axis_starts(length, tile, stride):
+    # Window offsets along one axis; the last window is flush with the edge.
+    if length <= tile:
+        return [0]
+    starts = list(range(0, length - tile + 1, stride))
+    if starts[-1] != length - tile:
+        starts.append(length - tile)
+    return starts
+
+
+def tile_windows(width, height, tile, overlap):
+    # Returns the x and y offsets of the window grid.
+    stride = max(1, int(tile * (1 - overlap)))
+    return axis_starts(width, tile, stride), axis_starts(height, tile, stride)
+
+
+def class_colors(num_classes):
+    # (num_classes, 3) uint8; a class keeps its color whatever num_classes is.
+    colors = [colorsys.hsv_to_rgb((i * 0.618033988749895) % 1.0, 0.65, 0.95) for i in range(num_classes)]
+    return (np.array(colors) * 255).astype(np.uint8)
+
+
+def classify_tiles(raster, loaded, tile=224, overlap=0.25, batch_size=32):
+    # Returns (label grid, confidence grid, mean probabilities over tiles).
+    xs, ys = tile_windows(raster.width, raster.height, tile, overlap)
+    windows = [(row, col, x, y) for row, y in enumerate(ys) for col, x in enumerate(xs)]
+    labels = torch.zeros(len(ys), len(xs), dtype=torch.long)
+    confidence = torch.zeros(len(ys), len(xs))
+    total = None
+
+    with torch.inference_mode():
+        for i in range(0, len(windows), batch_size):
+            chunk = windows[i : i + batch_size]
+            batch = torch.stack(
+                [
+                    fast_resize(raster.read(x, y, min(tile, raster.width), min(tile, raster.height)))
+                    for _, _, x, y in chunk
+                ]
+            )
+            probs = probabilities(loaded.model(loaded.to_device(batch)), loaded.temperature).cpu()
+            best, idx = probs.max(1)
+            for (row, col, _, _), p, c in zip(chunk, best.tolist(), idx.tolist()):
+                labels[row, col], confidence[row, col] = c, p
+            total = probs.sum(0) if total is None else total + probs.sum(0)
+    return labels, confidence, total / len(windows)
+
+
+def summarize(labels, mean_probs, idx_to_class, k):
+    counts = torch.bincount(labels.flatten(), minlength=len(mean_probs))
+    share = counts.float() / labels.numel()
+    order = share.argsort(descending=True)[:k]
+    return [
+        {
+            "class_index": i,
+            "class_name": idx_to_class[i],
+            "tile_share": round(share[i].item(), 4),
+            "mean_probability": round(mean_probs[i].item(), 4),
+        }
+        for i in order.tolist()
+        if counts[i] > 0
+    ]
+
+
+def save_heatmap(labels, path, cell=16):
+    # Colors are looked up per class index directly: a palette image would
+    # wrap indices of 256 and above (heads extended by finetune_head.py).
+    labels = labels.numpy()
+    image = Image.fromarray(class_colors(int(labels.max()) + 1)[labels], "RGB")
+    image.resize((labels.shape[1] * cell, labels.shape[0] * cell), Image.NEAREST).save(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Classify a large field image tile by tile.")
+    parser.add_argument("image", help="orthomosaic / aerial image (GeoTIFF, JPEG, PNG)")
+    parser.add_argument("-o", "--output", default="-", help="JSON output path (default: stdout)")
+    parser.add_argument("--heatmap", help="write the per-tile label grid as a PNG")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--tile-size", type=int, default=224, help="window size in source pixels")
+    parser.add_argument("--overlap", type=float, default=0.25, help="fraction of overlap between windows")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--top-k", type=int, default=config.TOP_K, help="classes in the summary")
+    args = parser.parse_args(argv)
+    if not 0 <= args.overlap < 1:
+        parser.error("--overlap must be in [0, 1)")
+
+    loaded = get_model(args.model)
+    raster = open_raster(args.image)
+    start = time.perf_counter()
+    try:
+        labels, confidence, mean_probs = classify_tiles(raster, loaded, args.tile_size, args.overlap, args.batch_size)
+    finally:
+        raster.close()
+    elapsed = time.perf_counter() - start
+    megapixels = raster.width * raster.height / 1e6
+
+    result = {
+        "image": args.image,
+        "width": raster.width,
+        "height": raster.height,
+        "tile_size": args.tile_size,
+        "overlap": args.overlap,
+        "grid": {
+            "rows": labels.shape[0],
+            "cols": labels.shape[1],
+            "labels": labels.tolist(),
+            "confidence": [[round(c, 3) for c in row] for row in confidence.tolist()],
+        },
+        "classes": {str(i): loaded.idx_to_class[i] for i in labels.unique().tolist()},
+        "summary": summarize(labels, mean_probs, loaded.idx_to_class, args.top_k),
+    }
+    out = sys.stdout if args.output == "-" else open(args.output, "w")
+    json.dump(result, out)
+    if out is not sys.stdout:
+        out.close()
+    if args.heatmap:
+        save_heatmap(labels, args.heatmap)
+
+    print(
+        f"{labels.numel()} tiles over {megapixels:.1f} MP in {elapsed:.1f}s "
+        f"({megapixels / elapsed if elapsed else 0:.2f} MP/sec)",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
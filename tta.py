@@ -0,0 +1,62 @@
+# tta.py
+# Test-time augmentation: flips and crops of one image are stacked into a
+# single batch, run through the model in one forward pass, and their logits
+# averaged. The number of views trades latency for accuracy; views are added
+# in a fixed order, so n views are always the first n of VIEWS.
+#
+#   CROP_TTA_VIEWS=4 streamlit run app.py
+#   python -m benchmarks.tta labeled_folder/ --views 1 2 4 8
+import torch
+import torch.nn.functional as F
+
+import config
+import metrics
+from preprocessing import fast_decode, fast_resize, load_image
+
+BASE_SIZE = 256  # views are cut from a 256x256 resize; crops are 224 (0.875)
+SIZE = 224
+VIEWS = ("full", "flip", "center", "center_flip", "top_left", "top_right", "bottom_left", "bottom_right")
+MAX_VIEWS = len(VIEWS)
+
+
+def _crop(base, name):
+    margin = BASE_SIZE - SIZE
+    y, x = {
+        "center": (margin // 2, margin // 2),
+        "top_left": (0, 0),
+        "top_right": (0, margin),
+        "bottom_left": (margin, 0),
+        "bottom_right": (margin, margin),
+    }[name]
+    return base[:, y : y + SIZE, x : x + SIZE]
+
+
+def tta_views(image, views=MAX_VIEWS):
+    # PIL image -> (views, 3, 224, 224) normalized tensor.
+    base = fast_resize(image, BASE_SIZE)
+    full = F.interpolate(base[None], size=(SIZE, SIZE), mode="bilinear", antialias=True, align_corners=False)[0]
+    out = []
+    for name in VIEWS[:views]:
+        if name == "full":
+            out.append(full)
+        elif name == "flip":
+            out.append(full.flip(-1))
+        elif name == "center_flip":
+            out.append(_crop(base, "center").flip(-1))
+        else:
+            out.append(_crop(base, name))
+    return torch.stack(out)
+
+
+def preprocess_views(fp, views=config.TTA_VIEWS):
+    # Like preprocessing.preprocess, but returns every view of the image.
+    with metrics.stage("decode"):
+        image = fast_decode(fp, BASE_SIZE) if config.FAST_DECODE else load_image(fp)
+    with metrics.stage("preprocess"):
+        return tta_views(image, views)
+
+
+def average_logits(logits, views):
+    # (N * views, C) logits from one forward pass -> (N, C) mean per image.
+    return logits.float().view(-1, views, logits.shape[1]).mean(1)
+
@@ -0,0 +1,74 @@
+# warmup.py
+# Background model loading for fast cold starts. Entry points import only this
+# module (stdlib + config) up front and call start(); torch, torchvision and
+# the checkpoint are then loaded on a daemon thread while the Streamlit shell
+# renders or the HTTP server answers health checks. ready() flips once the
+# model and any setup() hook are done.
+#
+#   warmup.start(setup=lambda loaded: ...)
+#   loaded = warmup.wait()  # blocks until ready, re-raises load errors
+import importlib
+import threading
+import time
+
+import config
+
+_lock = threading.Lock()
+_done = threading.Event()
+_thread = None
+_state = {"loaded": None, "error": None, "started": None, "seconds": None}
+
+
+def _load(path, backend, preload, setup):
+    try:
+        for name in preload:
+            importlib.import_module(name)
+        import model_registry
+
+        loaded = model_registry.get_model(path or model_registry.MODEL_PATH, backend or config.BACKEND)
+        if setup is not None:
+            setup(loaded)
+        _state["loaded"] = loaded
+    except Exception as e:  # surfaced by wait() / status()
+        _state["error"] = e
+    finally:
+        _state["seconds"] = round(time.perf_counter() - _state["started"], 3)
+        _done.set()
+
+
+def start(path=None, backend=None, preload=(), setup=None, background=True):
+    # Idempotent: only the first call starts the loader (Streamlit reruns the
+    # script on every interaction). `preload` names modules to import as well.
+    # background=False loads on the calling thread, e.g. before forking workers.
+    global _thread
+    with _lock:
+        if _thread is None:
+            _state["started"] = time.perf_counter()
+            _thread = threading.Thread(
+                target=_load, args=(path, backend, tuple(preload), setup), name="model-warmup", daemon=True
+            )
+            if background:
+                _thread.start()
+            else:
+                _thread.run()
+
+
+def ready():
+    return _done.is_set() and _state["error"] is None
+
+
+def status():
+    if not _done.is_set():
+        return {"status": "loading"}
+    if _state["error"] is not None:
+        error = _state["error"]
+        return {"status": "failed", "error": f"{type(error).__name__}: {error}"}
+    return {"status": "ready", "load_seconds": _state["seconds"]}
+
+
+def wait(timeout=None):
+    if not _done.wait(timeout):
+        raise TimeoutError("model is still loading")
+    if _state["error"] is not None:
+        raise _state["error"]
+    return _state["loaded"]
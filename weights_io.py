@@ -0,0 +1,131 @@
+# weights_io.py
+# Zero-copy checkpoint format: a safetensors-layout flat buffer for the weights
+# plus a small JSON sidecar (class_to_idx and other metadata). Loading mmaps the
+# file, so worker processes share the same page-cache pages instead of each
+# unpickling its own copy.
+#
+#   python weights_io.py crop_classifier_model.pkl
+#   -> crop_classifier_model.safetensors + crop_classifier_model.json
+import argparse
+import json
+import mmap
+import os
+import struct
+
+import torch
+
+_DTYPES = {
+    "F64": torch.float64,
+    "F32": torch.float32,
+    "F16": torch.float16,
+    "BF16": torch.bfloat16,
+    "I64": torch.int64,
+    "I32": torch.int32,
+    "I16": torch.int16,
+    "I8": torch.int8,
+    "U8": torch.uint8,
+    "BOOL": torch.bool,
+}
+_DTYPE_NAMES = {dtype: name for name, dtype in _DTYPES.items()}
+
+
+def sidecar_path(path):
+    return os.path.splitext(path)[0] + ".json"
+
+
+# ---------------------------
+# Flat tensor file
+# ---------------------------
+def save_tensors(path, tensors):
+    # Largest element size first keeps every tensor naturally aligned.
+    names = sorted(tensors, key=lambda n: (-tensors[n].element_size(), n))
+    header, chunks, offset = {}, [], 0
+    for name in names:
+        t = tensors[name].detach().cpu().contiguous()
+        data = t.reshape(-1).view(torch.uint8).numpy().tobytes()
+        header[name] = {
+            "dtype": _DTYPE_NAMES[t.dtype],
+            "shape": list(t.shape),
+            "data_offsets": [offset, offset + len(data)],
+        }
+        chunks.append(data)
+        offset += len(data)
+
+    header_bytes = json.dumps(header, separators=(",", ":")).encode()
+    header_bytes += b" " * (-len(header_bytes) % 8)  # data section starts 8-byte aligned
+    with open(path, "wb") as f:
+        f.write(struct.pack("<Q", len(header_bytes)))
+        f.write(header_bytes)
+        for chunk in chunks:
+            f.write(chunk)
+
+
+def load_tensors(path):
+    # ACCESS_COPY maps the file privately: pages stay shared with other
+    # processes (and the page cache) until something writes to them.
+    with open(path, "rb") as f:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    (header_len,) = struct.unpack("<Q", buf[:8])
+    header = json.loads(buf[8 : 8 + header_len])
+    header.pop("__metadata__", None)
+    base = 8 + header_len
+
+    tensors = {}
+    for name, info in header.items():
+        dtype = _DTYPES[info["dtype"]]
+        start, end = info["data_offsets"]
+        count = (end - start) // torch.empty((), dtype=dtype).element_size()
+        if count:
+            t = torch.frombuffer(buf, dtype=dtype, count=count, offset=base + start)
+        else:
+            t = torch.empty(0, dtype=dtype)
+        tensors[name] = t.reshape(info["shape"])
+    return tensors
+
+
+# ---------------------------
+# Checkpoint = weights + sidecar
+# ---------------------------
+def save_sidecar(path, class_to_idx, **metadata):
+    with open(sidecar_path(path), "w") as f:
+        json.dump({"class_to_idx": class_to_idx, **metadata}, f, indent=2, ensure_ascii=False)
+
+
+def read_sidecar(path):
+    # Metadata always has "class_to_idx".
+    with open(sidecar_path(path)) as f:
+        return json.load(f)
+
+
+def save_checkpoint(path, state_dict, class_to_idx, **metadata):
+    save_tensors(path, state_dict)
+    save_sidecar(path, class_to_idx, **metadata)
+
+
+def load_checkpoint(path):
+    # Returns (state_dict, metadata).
+    return load_tensors(path), read_sidecar(path)
+
+
+def convert(pkl_path, out_path=None):
+    import joblib
+
+    out_path = out_path or os.path.splitext(pkl_path)[0] + ".safetensors"
+    model_data = joblib.load(pkl_path)
+    metadata = {key: value for key, value in model_data.items() if key not in ("model_state_dict", "class_to_idx")}
+    save_checkpoint(out_path, model_data["model_state_dict"], model_data["class_to_idx"], **metadata)
+    return out_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert a joblib .pkl checkpoint to the mmap-able format.")
+    parser.add_argument("checkpoint", help="path to crop_classifier_model.pkl")
+    parser.add_argument("-o", "--output", help="output .safetensors path (sidecar .json is written next to it)")
+    args = parser.parse_args(argv)
+
+    out_path = convert(args.checkpoint, args.output)
+    print(f"Wrote {out_path} and {sidecar_path(out_path)}")
+
+
+if __name__ == "__main__":
+    main()
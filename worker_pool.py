@@ -0,0 +1,165 @@
+# worker_pool.py
+# Multi-process inference: N workers are forked *after* the model is loaded,
+# so they share its pages copy-on-write (and the mmap'd checkpoint through the
+# page cache). Each worker is pinned to its own CPU cores and sized its torch
+# thread pool to match, so throughput scales with cores instead of contending
+# for the GIL and one intra-op pool.
+#
+#   pool = WorkerPool(make_predict_batch(loaded), workers=4)
+#   results = pool.submit(tensors).result()
+import itertools
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import torch
+import torch.multiprocessing as mp
+
+import runtime
+
+_STOP = None
+LIVENESS_INTERVAL = 0.5  # seconds between checks for dead workers
+
+
+def core_groups(workers=None, cores=None):
+    # Split the CPUs we may use into disjoint, equally sized groups.
+    cores = sorted(cores or os.sched_getaffinity(0))[: runtime.cpu_quota()]
+    workers = max(1, min(workers or len(cores), len(cores)))
+    per_worker = len(cores) // workers
+    return [cores[i * per_worker : (i + 1) * per_worker] for i in range(workers)]
+
+
+def process_memory(pid="self"):
+    # Rss double-counts pages shared between workers; Pss splits them fairly,
+    # so summing Pss over the pool gives its real footprint.
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) * 1024
+    return {"rss": fields.get("Rss", 0), "pss": fields.get("Pss", 0)}
+
+
+def _worker_main(fn, cores, jobs, results):
+    os.sched_setaffinity(0, cores)
+    torch.set_num_threads(len(cores))
+    with torch.inference_mode():
+        while True:
+            job = jobs.get()
+            if job is _STOP:
+                return
+            job_id, payload = job
+            try:
+                results.put((job_id, True, fn(payload)))
+            except Exception as e:  # reported to the caller's Future
+                results.put((job_id, False, f"{type(e).__name__}: {e}"))
+
+
+class WorkerPool:
+    # fn(payload) -> result runs in the workers. With the fork start method it
+    # is inherited rather than pickled, so it can close over the loaded model.
+    def __init__(self, fn, workers=None, cores=None, queue_size=64):
+        if torch.cuda.is_initialized():
+            raise RuntimeError("WorkerPool forks worker processes and cannot be used after CUDA is initialized")
+        ctx = mp.get_context("fork")
+        self._jobs = ctx.Queue(maxsize=queue_size)  # bounded: submit() blocks when workers fall behind
+        self._results = ctx.Queue()
+        self._futures = {}
+        self._dead = set()  # indices of workers that exited unexpectedly
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+        self.core_groups = core_groups(workers, cores)
+        self.processes = [
+            ctx.Process(target=_worker_main, args=(fn, group, self._jobs, self._results), daemon=True)
+            for group in self.core_groups
+        ]
+        for process in self.processes:
+            process.start()
+        self._collector = threading.Thread(target=self._collect, name="worker-pool-results", daemon=True)
+        self._collector.start()
+
+    def submit(self, payload):
+        future = Future()
+        with self._lock:
+            if len(self._dead) == len(self.processes):
+                raise RuntimeError("all inference workers have exited")
+            job_id = next(self._ids)
+            self._futures[job_id] = future
+        self._jobs.put((job_id, payload))
+        return future
+
+    def __call__(self, payload):
+        return self.submit(payload).result()
+
+    def _collect(self):
+        # Polls with a timeout so dead workers are noticed even when no
+        # results arrive; their in-flight futures are failed, never left hanging.
+        next_check = time.monotonic() + LIVENESS_INTERVAL
+        while True:
+            try:
+                message = self._results.get(timeout=LIVENESS_INTERVAL)
+                if message is _STOP:
+                    return
+                self._resolve(*message)
+            except queue.Empty:
+                pass
+            if time.monotonic() >= next_check:
+                self._check_workers()
+                next_check = time.monotonic() + LIVENESS_INTERVAL
+
+    def _resolve(self, job_id, ok, value):
+        with self._lock:
+            future = self._futures.pop(job_id, None)
+        if future is None:  # already failed by _check_workers
+            return
+        if ok:
+            future.set_result(value)
+        else:
+            future.set_exception(RuntimeError(value))
+
+    def _check_workers(self):
+        dead = [i for i, p in enumerate(self.processes) if i not in self._dead and not p.is_alive()]
+        if not dead:
+            return
+        # Results a dead worker sent before exiting are still in the pipe
+        while True:
+            try:
+                message = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if message is _STOP:
+                self._results.put(_STOP)
+                break
+            self._resolve(*message)
+        # Which outstanding job the dead worker had dequeued cannot be known
+        # (it may have died right after taking it), so every outstanding job
+        # fails; callers retry rather than wait forever.
+        process = self.processes[dead[0]]
+        error = RuntimeError(f"inference worker {process.pid} exited with code {process.exitcode}")
+        with self._lock:
+            self._dead.update(dead)
+            failed = list(self._futures.values())
+            self._futures.clear()
+        for future in failed:
+            future.set_exception(error)
+
+    def memory(self):
+        # Summed footprint of this process and all workers, in bytes.
+        totals = {"rss": 0, "pss": 0}
+        for pid in ["self"] + [p.pid for p in self.processes]:
+            for key, value in process_memory(pid).items():
+                totals[key] += value
+        return totals
+
+    def close(self):
+        for process in self.processes:
+            if process.is_alive():
+                self._jobs.put(_STOP)
+        for process in self.processes:
+            process.join()
+        self._results.put(_STOP)
+        self._collector.join()